@@ -1,21 +1,64 @@
 import os
-import json
+import re
 import csv
-import math
 import argparse
+import logging
 import random
+import multiprocessing
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import numpy as np
 import geopandas as gpd
-from shapely.geometry import Point, Polygon
-from shapely.ops import transform
-import pyproj
-from functools import partial
+import shapely
+from shapely.geometry import Point
+from shapely.strtree import STRtree
+
+logger = logging.getLogger(__name__)
+
+# OBJ vertex ("v x y z") and face ("f ...") lines, matched over the raw file bytes at once
+VERTEX_LINE_RE = re.compile(rb'^[ \t]*v[ \t]+(\S+)[ \t]+(\S+)[ \t]+(\S+)', re.MULTILINE)
+FACE_LINE_RE = re.compile(rb'^[ \t]*f[ \t]+(.*)$', re.MULTILINE)
+
+# Character columns of the formatted NOP (XX.XX.XXX.XXX.XXX-XXXX.X) holding separators vs digits
+NOP_SEPARATOR_COLUMNS = np.array([2, 5, 9, 13, 17, 22])
+NOP_SEPARATORS = np.array(['.', '.', '.', '.', '-', '.'])
+NOP_DIGIT_COLUMNS = np.setdiff1d(np.arange(24), NOP_SEPARATOR_COLUMNS)
+
+# GDAL's columnar pyogrio reader is much faster than fiona; use fiona only if pyogrio is missing
+try:
+    import pyogrio
+    GEOJSON_ENGINE = 'pyogrio'
+except ImportError:
+    GEOJSON_ENGINE = 'fiona'
+
+# Generator shared by the worker processes, set once per worker by _init_worker
+_worker_generator = None
+
+def _init_worker(generator, log_queue=None, log_level=logging.WARNING):
+    """Process pool initializer: keep one generator instance per worker"""
+    global _worker_generator
+    _worker_generator = generator
+    
+    # Hand log records to the parent process instead of writing to the console from every worker
+    if log_queue is not None:
+        root_logger = logging.getLogger()
+        root_logger.handlers[:] = [QueueHandler(log_queue)]
+        root_logger.setLevel(log_level)
+
+def _compute_metrics_worker(obj_path):
+    """Compute metrics for a single OBJ file in a worker, returning (metrics, error)"""
+    try:
+        return _worker_generator.compute_building_metrics(obj_path), None
+    except Exception as e:
+        return None, str(e)
 
 class OBJToCSVGenerator:
-    def __init__(self, geojson_path, obj_folder_path, output_folder_path):
+    def __init__(self, geojson_path, obj_folder_path, output_folder_path, obj_crs=None, vertex_cache=False):
         self.geojson_path = geojson_path
         self.obj_folder_path = obj_folder_path
         self.output_folder_path = output_folder_path
+        self.vertex_cache = vertex_cache
         
         # Indonesian names for random generation
         self.first_names = [
@@ -40,17 +83,40 @@ class OBJToCSVGenerator:
         ]
         
         # Load administrative boundaries
+        # A pre-converted GeoParquet file skips GeoJSON parsing entirely
         print(f"Loading GeoJSON from: {geojson_path}")
-        self.gdf = gpd.read_file(geojson_path)
+        if str(geojson_path).lower().endswith('.parquet'):
+            self.gdf = gpd.read_parquet(geojson_path)
+        else:
+            self.gdf = gpd.read_file(geojson_path, engine=GEOJSON_ENGINE)
         print(f"Loaded {len(self.gdf)} administrative boundaries")
         
+        # Reproject boundaries once to the CRS of the OBJ coordinates (e.g. UTM meters)
+        if obj_crs is not None:
+            self.gdf = self.gdf.to_crs(obj_crs)
+            print(f"Reprojected administrative boundaries to {obj_crs}")
+        
         # Create unique codes for administrative areas
         self.create_admin_codes()
         
+        # Build spatial index for administrative lookups
+        self.create_spatial_index()
+        
         # Ensure output folder exists
         os.makedirs(output_folder_path, exist_ok=True)
         print(f"Output directory created/verified: {output_folder_path}")
     
+    def __getstate__(self):
+        """Drop administrative data when pickling for worker processes.
+        
+        Workers only compute per-file metrics; administrative lookups run in
+        the parent process, so there is no need to ship boundaries to them.
+        """
+        state = self.__dict__.copy()
+        for key in ('gdf', '_geoms', '_tree', '_admin_attrs', '_last_hit'):
+            state.pop(key, None)
+        return state
+    
     def generate_indonesian_name(self):
         """Generate random Indonesian name with 2 or 3 words"""
         first_name = random.choice(self.first_names)
@@ -65,6 +131,20 @@ class OBJToCSVGenerator:
             middle_name = random.choice(self.middle_names)
             return f"{first_name} {middle_name} {last_name}"
     
+    def generate_indonesian_names(self, count):
+        """Generate count random Indonesian names at once, drawing each name part in one NumPy call"""
+        rng = np.random.default_rng()
+        first_idx = rng.integers(len(self.first_names), size=count).tolist()
+        middle_idx = rng.integers(len(self.middle_names), size=count).tolist()
+        last_idx = rng.integers(len(self.last_names), size=count).tolist()
+        
+        # 60% chance for 2 words, 40% chance for 3 words
+        three_words = (rng.random(count) >= 0.6).tolist()
+        
+        first, middle, last = self.first_names, self.middle_names, self.last_names
+        return [f"{first[f]} {middle[m]} {last[l]}" if three else f"{first[f]} {last[l]}"
+                for f, m, l, three in zip(first_idx, middle_idx, last_idx, three_words)]
+    
     def format_nop(self, nop_digits):
         """Format 18-digit NOP into XX.XX.XXX.XXX.XXX-XXXX.X pattern"""
         if len(nop_digits) != 18:
@@ -88,151 +168,210 @@ class OBJToCSVGenerator:
         self.kecamatan_codes = {kec: f"{i+1:02d}" for i, kec in enumerate(unique_kecamatan)}
         self.kelurahan_codes = {kel: f"{i+1:03d}" for i, kel in enumerate(unique_kelurahan)}
         
+        # Attach codes to each boundary so a matched building carries them without dict lookups
+        self.gdf['kota_code'] = self.gdf['WADMKK'].map(self.kota_codes).fillna("00")
+        self.gdf['kecamatan_code'] = self.gdf['WADMKC'].map(self.kecamatan_codes).fillna("00")
+        self.gdf['kelurahan_code'] = self.gdf['WADMKD'].map(self.kelurahan_codes).fillna("000")
+        
         print("Administrative Codes Created:")
         print(f"  - Kota codes: {len(self.kota_codes)} entries")
         print(f"  - Kecamatan codes: {len(self.kecamatan_codes)} entries")
         print(f"  - Kelurahan codes: {len(self.kelurahan_codes)} entries")
     
-    def parse_obj_file(self, obj_path):
-        """Parse OBJ file to extract vertices and faces"""
-        vertices = []
-        faces = []
+    def create_spatial_index(self):
+        """Build STRtree over administrative boundaries for fast point lookups"""
+        self._geoms = np.asarray(self.gdf.geometry.values)
+        self._tree = STRtree(self._geoms)
+        
+        # Prepare geometries in place so repeated containment tests are much cheaper
+        shapely.prepare(self._geoms)
+        
+        # Plain ndarray of names and codes per boundary avoids pandas access per hit
+        admin_names = self.gdf[['WADMKD', 'WADMKC', 'WADMKK']].fillna('UNKNOWN')
+        admin_codes = self.gdf[['kelurahan_code', 'kecamatan_code', 'kota_code']]
+        self._admin_attrs = np.hstack([admin_names.to_numpy(), admin_codes.to_numpy()])
+        
+        # Boundary that contained the previous building (consecutive buildings are usually neighbours)
+        self._last_hit = None
+        
+        print(f"Spatial index built over {len(self._tree)} administrative boundaries")
+    
+    def parse_obj_file(self, obj_path, parse_faces=False):
+        """Parse OBJ file to extract vertices (and faces if parse_faces is True)"""
+        faces = [] if parse_faces else None
         
         try:
-            with open(obj_path, 'r', encoding='utf-8') as file:
-                for line_num, line in enumerate(file, 1):
-                    line = line.strip()
-                    if line.startswith('v '):  # Vertex
-                        parts = line.split()
-                        if len(parts) >= 4:
-                            try:
-                                x, y, z = float(parts[1]), float(parts[2]), float(parts[3])
-                                vertices.append((x, y, z))
-                            except ValueError:
-                                print(f"Warning: Invalid vertex at line {line_num} in {obj_path}")
-                    elif line.startswith('f '):  # Face
-                        parts = line.split()[1:]  # Skip 'f'
-                        face_vertices = []
-                        for part in parts:
-                            try:
-                                # Handle different face formats (v, v/vt, v/vt/vn, v//vn)
-                                vertex_index = int(part.split('/')[0]) - 1  # OBJ indices start at 1
-                                if vertex_index >= 0 and vertex_index < len(vertices):
-                                    face_vertices.append(vertex_index)
-                            except (ValueError, IndexError):
-                                continue
-                        if len(face_vertices) >= 3:  # Valid face needs at least 3 vertices
-                            faces.append(face_vertices)
+            # Bytes skip UTF-8 decoding; NumPy parses the byte tokens to float64 directly
+            data = Path(obj_path).read_bytes()
+            
+            # Convert all vertex coordinates in one NumPy call
+            vertex_matches = VERTEX_LINE_RE.findall(data)
+            try:
+                vertices = np.array(vertex_matches, dtype=np.float64).reshape(-1, 3)
+            except ValueError:
+                vertices = self._convert_vertices(vertex_matches, obj_path)
+            
+            # Building metrics only need vertices, so face lines are skipped by default
+            if parse_faces:
+                num_vertices = len(vertices)
+                for face_line in FACE_LINE_RE.findall(data):
+                    face_vertices = []
+                    for part in face_line.split():
+                        try:
+                            # Handle different face formats (v, v/vt, v/vt/vn, v//vn)
+                            vertex_index = int(part.split(b'/')[0]) - 1  # OBJ indices start at 1
+                            if vertex_index >= 0 and vertex_index < num_vertices:
+                                face_vertices.append(vertex_index)
+                        except (ValueError, IndexError):
+                            continue
+                    if len(face_vertices) >= 3:  # Valid face needs at least 3 vertices
+                        faces.append(face_vertices)
         except Exception as e:
-            print(f"Error parsing {obj_path}: {e}")
-            return [], []
+            logger.warning("Error parsing %s: %s", obj_path, e)
+            return np.empty((0, 3)), faces
         
-        print(f"  - Parsed {len(vertices)} vertices and {len(faces)} faces")
+        if parse_faces:
+            logger.debug("  - Parsed %d vertices and %d faces", len(vertices), len(faces))
+        else:
+            logger.debug("  - Parsed %d vertices", len(vertices))
         return vertices, faces
     
-    def calculate_ground_area(self, vertices, faces):
-        """Calculate 2D ground area of the building"""
-        if not vertices or not faces:
+    def _convert_vertices(self, vertex_matches, obj_path):
+        """Slow path for vertex conversion that skips invalid coordinates"""
+        vertices = []
+        for coords in vertex_matches:
+            try:
+                vertices.append(tuple(float(c) for c in coords))
+            except ValueError:
+                logger.warning("Invalid vertex %s in %s", b' '.join(coords).decode(errors='replace'), obj_path)
+        return np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    
+    def load_vertices(self, obj_path):
+        """Load OBJ vertices, using a .verts.npy sidecar cache when vertex_cache is enabled"""
+        if not self.vertex_cache:
+            return self.parse_obj_file(obj_path)[0]
+        
+        # The sidecar is valid as long as it was written after the OBJ last changed
+        cache_path = f"{obj_path}.verts.npy"
+        try:
+            if os.path.getmtime(cache_path) >= os.path.getmtime(obj_path):
+                logger.debug("  - Loaded vertices from cache %s", cache_path)
+                return np.load(cache_path, mmap_mode='r')
+        except (OSError, ValueError):
+            pass
+        
+        vertices, _ = self.parse_obj_file(obj_path)
+        
+        # Write to a temporary file first so a concurrent reader never sees a partial cache
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, vertices)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning("Could not write vertex cache %s: %s", cache_path, e)
+        return vertices
+    
+    def calculate_ground_area(self, xs, ys, zs):
+        """Calculate 2D ground area of the building from its lowest vertices"""
+        if len(zs) == 0:
             return 0.0
         
-        # Find the minimum Z coordinate (ground level)
-        min_z = min(vertex[2] for vertex in vertices)
+        # Vertices at or near ground level (minimum Z)
         tolerance = 0.1  # Small tolerance for floating point comparison
+        ground_mask = np.abs(zs - zs.min()) <= tolerance
+        
+        if np.count_nonzero(ground_mask) < 3:
+            return 0.0
         
-        # Get vertices that are at or near ground level
-        ground_vertices = []
-        for vertex in vertices:
-            if abs(vertex[2] - min_z) <= tolerance:
-                ground_vertices.append((vertex[0], vertex[1]))  # Only X, Y coordinates
+        # Remove duplicates while preserving order
+        ground_vertices = np.column_stack((xs[ground_mask], ys[ground_mask]))
+        _, first_idx = np.unique(ground_vertices, axis=0, return_index=True)
+        unique_ground_vertices = ground_vertices[np.sort(first_idx)]
         
-        if len(ground_vertices) < 3:
+        if len(unique_ground_vertices) < 3:
             return 0.0
         
-        # Create a polygon from ground vertices and calculate area
-        try:
-            # Remove duplicates while preserving order
-            unique_ground_vertices = []
-            for vertex in ground_vertices:
-                if vertex not in unique_ground_vertices:
-                    unique_ground_vertices.append(vertex)
-            
-            if len(unique_ground_vertices) >= 3:
-                polygon = Polygon(unique_ground_vertices)
-                return abs(polygon.area)  # Ensure positive area
-        except Exception as e:
-            print(f"    Warning: Error calculating ground area: {e}")
+        # Shoelace area of the ground ring (same as Polygon(...).area without building a GEOS object);
+        # shift to the first vertex so large UTM coordinates don't lose precision
+        x = unique_ground_vertices[:, 0] - unique_ground_vertices[0, 0]
+        y = unique_ground_vertices[:, 1] - unique_ground_vertices[0, 1]
         
-        return 0.0
+        # The first vertex is now the origin, so the closing term vanishes and
+        # the sum needs only slice views instead of rolled copies
+        area = 0.5 * abs(np.dot(x[:-1], y[1:]) - np.dot(y[:-1], x[1:]))
+        return float(area)
     
-    def calculate_building_height(self, vertices):
+    def calculate_building_height(self, zs):
         """Calculate building height (max Z - min Z)"""
-        if not vertices:
+        if len(zs) == 0:
             return 0.0
         
-        z_coords = [vertex[2] for vertex in vertices]
-        height = max(z_coords) - min(z_coords)
-        return abs(height)  # Ensure positive height
+        return float(zs.max() - zs.min())
     
-    def calculate_centroid(self, vertices):
+    def calculate_centroid(self, xs, ys):
         """Calculate centroid of the building"""
-        if not vertices:
+        if len(xs) == 0:
             return 0.0, 0.0
         
-        x_coords = [vertex[0] for vertex in vertices]
-        y_coords = [vertex[1] for vertex in vertices]
-        
-        centroid_x = sum(x_coords) / len(x_coords)
-        centroid_y = sum(y_coords) / len(y_coords)
-        
-        return centroid_x, centroid_y
+        return float(xs.mean()), float(ys.mean())
     
     def find_overlapping_admin(self, centroid_x, centroid_y):
         """Find administrative area that contains the building centroid"""
+        # Most buildings fall in the same area as the previous one, so try it first
+        if (self._last_hit is not None
+                and shapely.contains_xy(self._geoms[self._last_hit], centroid_x, centroid_y)):
+            return self._admin_info(self._last_hit)
+        
         point = Point(centroid_x, centroid_y)
         
-        # Check which polygon contains this point
-        for idx, row in self.gdf.iterrows():
-            try:
-                if row.geometry and row.geometry.contains(point):
-                    return {
-                        'kelurahan': row['WADMKD'] if pd.notna(row['WADMKD']) else 'UNKNOWN',
-                        'kecamatan': row['WADMKC'] if pd.notna(row['WADMKC']) else 'UNKNOWN',
-                        'kota': row['WADMKK'] if pd.notna(row['WADMKK']) else 'UNKNOWN'
-                    }
-            except Exception:
-                continue
+        # Test all bbox candidates in one vectorized call (first match in GeoJSON order)
+        candidates = np.sort(self._tree.query(point))
+        inside = shapely.contains_xy(self._geoms[candidates], centroid_x, centroid_y)
+        if inside.any():
+            self._last_hit = candidates[inside.argmax()]
+            return self._admin_info(self._last_hit)
         
         # If no exact match, find the closest one
-        min_distance = float('inf')
-        closest_admin = None
+        return self._admin_info(self._tree.nearest(point))
+    
+    def find_overlapping_admin_batch(self, centroids_x, centroids_y):
+        """Find administrative areas for many building centroids in one bulk spatial join"""
+        points = shapely.points(centroids_x, centroids_y)
+        admin_idx = np.full(len(points), -1, dtype=np.intp)
         
-        for idx, row in self.gdf.iterrows():
-            try:
-                if row.geometry:
-                    distance = point.distance(row.geometry)
-                    if distance < min_distance:
-                        min_distance = distance
-                        closest_admin = {
-                            'kelurahan': row['WADMKD'] if pd.notna(row['WADMKD']) else 'UNKNOWN',
-                            'kecamatan': row['WADMKC'] if pd.notna(row['WADMKC']) else 'UNKNOWN',
-                            'kota': row['WADMKK'] if pd.notna(row['WADMKK']) else 'UNKNOWN'
-                        }
-            except Exception:
-                continue
-        
-        return closest_admin or {'kelurahan': 'UNKNOWN', 'kecamatan': 'UNKNOWN', 'kota': 'UNKNOWN'}
+        # All (point, polygon) containment pairs in a single tree query
+        point_idx, tree_idx = self._tree.query(points, predicate='within')
+        
+        # Keep the first containing polygon (GeoJSON order) for each point
+        order = np.lexsort((tree_idx, point_idx))
+        matched_points, first = np.unique(point_idx[order], return_index=True)
+        admin_idx[matched_points] = tree_idx[order][first]
+        
+        # If no exact match, find the closest one
+        unmatched = np.flatnonzero(admin_idx < 0)
+        if len(unmatched) and len(self._tree):
+            admin_idx[unmatched] = self._tree.nearest(points[unmatched])
+        
+        return [self._admin_info(idx) for idx in admin_idx]
+    
+    def _admin_info(self, idx):
+        """Build admin info dict for the administrative boundary at row idx"""
+        if idx is None or idx < 0:
+            return {'kelurahan': 'UNKNOWN', 'kecamatan': 'UNKNOWN', 'kota': 'UNKNOWN',
+                    'kelurahan_code': "000", 'kecamatan_code': "00", 'kota_code': "00"}
+        
+        kelurahan, kecamatan, kota, kelurahan_code, kecamatan_code, kota_code = self._admin_attrs[idx]
+        return {'kelurahan': kelurahan, 'kecamatan': kecamatan, 'kota': kota,
+                'kelurahan_code': kelurahan_code, 'kecamatan_code': kecamatan_code, 'kota_code': kota_code}
     
     def generate_nib(self, kota, kecamatan, centroid_x, centroid_y):
         """Generate 14-digit NIB"""
         kota_code = self.kota_codes.get(kota, "00")
         kecamatan_code = self.kecamatan_codes.get(kecamatan, "00")
         
-        # Get last 5 digits of X and Y coordinates (no decimals)
-        x_str = str(int(abs(centroid_x)))[-5:].zfill(5)
-        y_str = str(int(abs(centroid_y)))[-5:].zfill(5)
-        
-        nib = kota_code + kecamatan_code + x_str + y_str
-        return nib
+        # Last 5 digits of X and Y coordinates (no decimals)
+        return f"{kota_code}{kecamatan_code}{int(abs(centroid_x)) % 100000:05d}{int(abs(centroid_y)) % 100000:05d}"
     
     def generate_nop(self, kota, kecamatan, kelurahan, centroid_x, centroid_y):
         """Generate 18-digit NOP and format it"""
@@ -255,63 +394,132 @@ class OBJToCSVGenerator:
         formatted_nop = self.format_nop(nop_digits)
         return formatted_nop
     
-    def process_obj_file(self, obj_path):
-        """Process a single OBJ file and return CSV row data"""
+    def lookup_admin_codes(self, admin_info):
+        """Return (kota_code, kecamatan_code, kelurahan_code) for an admin info dict"""
+        if 'kota_code' in admin_info:
+            return admin_info['kota_code'], admin_info['kecamatan_code'], admin_info['kelurahan_code']
+        
+        return (self.kota_codes.get(admin_info['kota'], "00"),
+                self.kecamatan_codes.get(admin_info['kecamatan'], "00"),
+                self.kelurahan_codes.get(admin_info['kelurahan'], "000"))
+    
+    def generate_nib_batch(self, admin_codes, centroids_x, centroids_y):
+        """Generate 14-digit NIBs for many buildings at once from their admin code triples"""
+        codes = np.array(admin_codes, dtype=str).reshape(-1, 3)
+        
+        # Get last 5 digits of X and Y coordinates (no decimals)
+        x_str = np.char.zfill((self._coordinate_ints(centroids_x) % 100000).astype(str), 5)
+        y_str = np.char.zfill((self._coordinate_ints(centroids_y) % 100000).astype(str), 5)
+        
+        nibs = np.char.add(np.char.add(codes[:, 0], codes[:, 1]), np.char.add(x_str, y_str))
+        return nibs.tolist()
+    
+    def generate_nop_batch(self, admin_codes, centroids_x, centroids_y):
+        """Generate formatted 18-digit NOPs for many buildings at once from their admin code triples"""
+        codes = np.array(admin_codes, dtype=str).reshape(-1, 3)
+        
+        # Combine integer coordinates; casting to U11 keeps the first 11 digits
+        coord_str = np.char.add(self._coordinate_ints(centroids_x).astype(str),
+                                self._coordinate_ints(centroids_y).astype(str)).astype('U11')
+        coord_part = np.char.ljust(coord_str, 11, '0')
+        
+        nop_digits = np.char.add(np.char.add(codes[:, 0], codes[:, 1]),
+                                 np.char.add(codes[:, 2], coord_part))
+        
+        # Format all NOPs at once on a character grid; short codes leave empty cells, padded with '0' like format_nop
+        digit_chars = np.ascontiguousarray(nop_digits, dtype='U18').view('U1').reshape(-1, 18)
+        formatted = np.empty((len(digit_chars), 24), dtype='U1')
+        formatted[:, NOP_DIGIT_COLUMNS] = np.where(digit_chars == '', '0', digit_chars)
+        formatted[:, NOP_SEPARATOR_COLUMNS] = NOP_SEPARATORS
+        return formatted.view('U24').ravel().tolist()
+    
+    @staticmethod
+    def _coordinate_ints(coords):
+        """Absolute coordinates truncated to integers (no decimals)"""
+        return np.abs(np.asarray(coords, dtype=np.float64)).astype(np.int64)
+    
+    def compute_building_metrics(self, obj_path):
+        """Parse a single OBJ file and compute its ground area, height and centroid"""
         filename = Path(obj_path).stem  # Filename without extension
-        print(f"Processing: {filename}")
+        logger.debug("Processing: %s", filename)
         
-        # Parse OBJ file
-        vertices, faces = self.parse_obj_file(obj_path)
+        # Parse OBJ file (or load its cached vertices)
+        vertices = self.load_vertices(obj_path)
         
-        if not vertices:
-            print(f"  Warning: No vertices found in {obj_path}")
+        if len(vertices) == 0:
+            logger.warning("No vertices found in %s", obj_path)
             return None
         
-        # Calculate metrics
-        ground_area = self.calculate_ground_area(vertices, faces)
-        building_height = self.calculate_building_height(vertices)
-        centroid_x, centroid_y = self.calculate_centroid(vertices)
+        # Split into contiguous X/Y/Z columns so each reduction scans dense memory
+        xs, ys, zs = np.ascontiguousarray(vertices.T)
         
-        print(f"  - Ground area: {ground_area:.2f} m²")
-        print(f"  - Building height: {building_height:.2f} m")
-        print(f"  - Centroid: ({centroid_x:.2f}, {centroid_y:.2f})")
+        # Calculate metrics
+        ground_area = self.calculate_ground_area(xs, ys, zs)
+        building_height = self.calculate_building_height(zs)
+        centroid_x, centroid_y = self.calculate_centroid(xs, ys)
         
-        # Calculate number of floors
-        jumlah_lantai = max(1, int(building_height / 5))  # Minimum 1 floor
+        logger.debug("  - Ground area: %.2f m², height: %.2f m, centroid: (%.2f, %.2f)",
+                     ground_area, building_height, centroid_x, centroid_y)
         
-        # Find administrative area
-        admin_info = self.find_overlapping_admin(centroid_x, centroid_y)
-        print(f"  - Administrative area: {admin_info}")
+        return {
+            'uuid': filename,
+            'ground_area': ground_area,
+            'building_height': building_height,
+            'centroid_x': centroid_x,
+            'centroid_y': centroid_y
+        }
+    
+    def build_row(self, metrics, admin_info, nib=None, nop=None, owner_name=None):
+        """Build CSV row data from building metrics and its administrative area"""
+        centroid_x, centroid_y = metrics['centroid_x'], metrics['centroid_y']
         
-        # Generate random Indonesian name
-        owner_name = self.generate_indonesian_name()
-        print(f"  - Generated owner name: {owner_name}")
+        # Calculate number of floors
+        jumlah_lantai = max(1, int(metrics['building_height'] / 5))  # Minimum 1 floor
         
-        # Generate NIB and NOP
-        nib = self.generate_nib(admin_info['kota'], admin_info['kecamatan'], centroid_x, centroid_y)
-        nop = self.generate_nop(admin_info['kota'], admin_info['kecamatan'], 
-                               admin_info['kelurahan'], centroid_x, centroid_y)
+        # Generate random Indonesian name unless drawn in batch
+        if owner_name is None:
+            owner_name = self.generate_indonesian_name()
         
-        print(f"  - NIB: {nib}")
-        print(f"  - NOP: {nop}")
+        # Generate NIB and NOP unless precomputed in batch
+        if nib is None:
+            nib = self.generate_nib(admin_info['kota'], admin_info['kecamatan'], centroid_x, centroid_y)
+        if nop is None:
+            nop = self.generate_nop(admin_info['kota'], admin_info['kecamatan'], 
+                                   admin_info['kelurahan'], centroid_x, centroid_y)
         
         return {
-            'uuid': filename,
+            'uuid': metrics['uuid'],
             'ownerName': owner_name,
             'village': admin_info['kelurahan'],
             'district': admin_info['kecamatan'],
             'city': admin_info['kota'],
             'province': "DKJ",
-            'buildingArea': round(ground_area, 2),
-            'buildingHeight': round(building_height, 2),
+            'buildingArea': round(metrics['ground_area'], 2),
+            'buildingHeight': round(metrics['building_height'], 2),
             'floorCount': jumlah_lantai,
             'nib': nib,
             'nop': nop
         }
     
-    def generate_csv_for_all_obj(self):
-        """Generate CSV file for all OBJ files in the folder"""
-        obj_files = list(Path(self.obj_folder_path).glob("*.obj"))
+    def process_obj_file(self, obj_path):
+        """Process a single OBJ file and return CSV row data"""
+        metrics = self.compute_building_metrics(obj_path)
+        if metrics is None:
+            return None
+        
+        # Find administrative area
+        admin_info = self.find_overlapping_admin(metrics['centroid_x'], metrics['centroid_y'])
+        row_data = self.build_row(metrics, admin_info)
+        logger.debug("  - Administrative area: %s, owner: %s, NIB: %s, NOP: %s",
+                     admin_info, row_data['ownerName'], row_data['nib'], row_data['nop'])
+        
+        return row_data
+    
+    def generate_csv_for_all_obj(self, max_workers=None):
+        """Generate CSV file for all OBJ files in the folder using a process pool"""
+        # scandir yields plain path strings (cheap to pickle to workers) with cached file types
+        with os.scandir(self.obj_folder_path) as entries:
+            obj_files = [entry.path for entry in entries if entry.name.endswith('.obj') and entry.is_file()]
         
         if not obj_files:
             print(f"No OBJ files found in {self.obj_folder_path}")
@@ -320,35 +528,71 @@ class OBJToCSVGenerator:
         print(f"\nFound {len(obj_files)} OBJ files")
         print("=" * 50)
         
-        # Process each OBJ file
-        all_data = []
-        successful_count = 0
+        # Phase 1: compute metrics for every OBJ file in parallel; each file is independent
+        all_metrics = []
         
-        for i, obj_file in enumerate(obj_files, 1):
-            print(f"\n[{i}/{len(obj_files)}] Processing {obj_file.name}...")
-            try:
-                row_data = self.process_obj_file(obj_file)
-                if row_data:
-                    all_data.append(row_data)
-                    successful_count += 1
-                    print(f"  ✓ Successfully processed")
-                else:
-                    print(f"  ✗ Failed to process")
-            except Exception as e:
-                print(f"  ✗ Error processing {obj_file.name}: {e}")
-        
-        # Write to CSV
-        if all_data:
+        workers = max_workers or os.cpu_count() or 1
+        chunksize = max(1, len(obj_files) // (workers * 4))
+        
+        # Worker log records go through a queue to the parent's handlers (if logging is configured)
+        root_handlers = logging.getLogger().handlers
+        log_queue = multiprocessing.Queue() if root_handlers else None
+        listener = None
+        if log_queue is not None:
+            listener = QueueListener(log_queue, *root_handlers, respect_handler_level=True)
+            listener.start()
+        
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(self, log_queue, logger.getEffectiveLevel())) as executor:
+                results = executor.map(_compute_metrics_worker, obj_files, chunksize=chunksize)
+                
+                for i, (obj_file, (metrics, error)) in enumerate(zip(obj_files, results), 1):
+                    if error:
+                        logger.warning("✗ Error processing %s: %s", os.path.basename(obj_file), error)
+                    elif metrics:
+                        all_metrics.append(metrics)
+                        logger.debug("[%d/%d] ✓ Successfully processed %s", i, len(obj_files), os.path.basename(obj_file))
+                    else:
+                        logger.warning("✗ Failed to process %s", os.path.basename(obj_file))
+                
+                    if i % 100 == 0 or i == len(obj_files):
+                        logger.info("[%d/%d] OBJ files processed", i, len(obj_files))
+        finally:
+            if listener is not None:
+                listener.stop()
+        
+        # Phase 2: resolve administrative areas for all centroids in one spatial join
+        if all_metrics:
+            centroids_x = [m['centroid_x'] for m in all_metrics]
+            centroids_y = [m['centroid_y'] for m in all_metrics]
+            admin_infos = self.find_overlapping_admin_batch(centroids_x, centroids_y)
+            
+            # Generate NIB and NOP for all buildings at once
+            admin_codes = [self.lookup_admin_codes(a) for a in admin_infos]
+            nibs = self.generate_nib_batch(admin_codes, centroids_x, centroids_y)
+            nops = self.generate_nop_batch(admin_codes, centroids_x, centroids_y)
+            owner_names = self.generate_indonesian_names(len(all_metrics))
+            
             csv_filename = os.path.join(self.output_folder_path, "buildings_data.csv")
             
             # Updated fieldnames to match the new column structure
             fieldnames = ['uuid', 'ownerName', 'village', 'district', 'city', 'province',
                          'buildingArea', 'buildingHeight', 'floorCount', 'nib', 'nop']
             
+            # Stream rows to CSV as they are built instead of collecting them first
+            successful_count = 0
+            sample = None
             with open(csv_filename, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+                # Rows come from build_row with exactly these keys, so skip the per-row extra-key check
+                writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
                 writer.writeheader()
-                writer.writerows(all_data)
+                for metrics, admin_info, nib, nop, owner_name in zip(all_metrics, admin_infos, nibs, nops, owner_names):
+                    row_data = self.build_row(metrics, admin_info, nib, nop, owner_name)
+                    writer.writerow(row_data)
+                    successful_count += 1
+                    if sample is None:
+                        sample = row_data
             
             print("\n" + "=" * 50)
             print("PROCESSING COMPLETE")
@@ -357,14 +601,12 @@ class OBJToCSVGenerator:
             print(f"Total OBJ files found: {len(obj_files)}")
             print(f"Successfully processed: {successful_count}")
             print(f"Failed to process: {len(obj_files) - successful_count}")
-            print(f"Records in CSV: {len(all_data)}")
+            print(f"Records in CSV: {successful_count}")
             
             # Show sample of generated data
-            if all_data:
-                print(f"\nSample record:")
-                sample = all_data[0]
-                for key, value in sample.items():
-                    print(f"  {key}: {value}")
+            print(f"\nSample record:")
+            for key, value in sample.items():
+                print(f"  {key}: {value}")
         else:
             print("\n" + "=" * 50)
             print("ERROR: No valid data to write to CSV")
@@ -378,6 +620,8 @@ def main():
 Examples:
   python attribute_gen.py --geojson data.geojson --obj_dir ./objects --output ./results
   python attribute_gen.py --geojson "Kelurahan DKI.geojson" --obj_dir "C:/models" --output "C:/output"
+  python attribute_gen.py --geojson "Kelurahan DKI.geojson" --obj_dir ./translated --output ./translated --obj_crs EPSG:32748
+  python attribute_gen.py --geojson_parquet "Kelurahan DKI.parquet" --obj_dir ./translated --output ./translated
 
 Features:
   - Random Indonesian owner names (2-3 words)
@@ -386,12 +630,17 @@ Features:
         """
     )
     
-    parser.add_argument(
+    boundaries = parser.add_mutually_exclusive_group(required=True)
+    boundaries.add_argument(
         '--geojson',
-        required=True,
         help='Path to the GeoJSON file containing administrative boundaries'
     )
     
+    boundaries.add_argument(
+        '--geojson_parquet',
+        help='Path to the administrative boundaries pre-converted to GeoParquet (faster startup)'
+    )
+    
     parser.add_argument(
         '--obj_dir',
         required=True,
@@ -404,11 +653,40 @@ Features:
         help='Output directory for generated CSV files'
     )
     
+    parser.add_argument(
+        '--obj_crs',
+        default=None,
+        help='CRS of the OBJ coordinates, e.g. EPSG:32748; boundaries are reprojected to it once (default: use GeoJSON CRS)'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of worker processes (default: number of CPUs)'
+    )
+    
+    parser.add_argument(
+        '--vertex_cache',
+        action='store_true',
+        help='Cache parsed vertices next to each OBJ as <name>.obj.verts.npy for faster re-runs'
+    )
+    
+    parser.add_argument(
+        '--verbose',
+        action='store_true',
+        help='Log details for every OBJ file (default: progress every 100 files)'
+    )
+    
     args = parser.parse_args()
     
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format='%(message)s')
+    
+    geojson_path = args.geojson_parquet or args.geojson
+    
     # Validate input files/directories
-    if not os.path.exists(args.geojson):
-        print(f"Error: GeoJSON file not found: {args.geojson}")
+    if not os.path.exists(geojson_path):
+        print(f"Error: GeoJSON file not found: {geojson_path}")
         return 1
     
     if not os.path.exists(args.obj_dir):
@@ -421,17 +699,18 @@ Features:
     
     print("OBJ to CSV Generator with Indonesian Names")
     print("=" * 50)
-    print(f"GeoJSON file: {args.geojson}")
+    print(f"GeoJSON file: {geojson_path}")
     print(f"OBJ directory: {args.obj_dir}")
     print(f"Output directory: {args.output}")
     print("=" * 50)
     
     try:
         # Create generator instance
-        generator = OBJToCSVGenerator(args.geojson, args.obj_dir, args.output)
+        generator = OBJToCSVGenerator(geojson_path, args.obj_dir, args.output, obj_crs=args.obj_crs,
+                                      vertex_cache=args.vertex_cache)
         
         # Generate CSV for all OBJ files
-        generator.generate_csv_for_all_obj()
+        generator.generate_csv_for_all_obj(max_workers=args.workers)
         
         return 0
     
@@ -441,6 +720,5 @@ Features:
 
 if __name__ == "__main__":
     import sys
-    import pandas as pd  # Add pandas import for notna function
     
     sys.exit(main())
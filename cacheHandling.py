@@ -6,22 +6,22 @@ def delete_files(directory):
     
     for filename in files_to_delete:
         file_path = os.path.join(directory, filename)
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-                print(f"Deleted: {file_path}")
-            except Exception as e:
-                print(f"Error deleting {file_path}: {e}")
-        else:
+        # Just try to delete; a missing file is reported by the exception instead of a separate exists() stat
+        try:
+            os.unlink(file_path)
+            print(f"Deleted: {file_path}")
+        except FileNotFoundError:
             print(f"File not found: {file_path}")
+        except OSError as e:
+            print(f"Error deleting {file_path}: {e}")
 
 def delete_directories(directories):
     for directory in directories:
-        if os.path.exists(directory) and os.path.isdir(directory):
-            try:
-                shutil.rmtree(directory)
-                print(f"Deleted directory: {directory}")
-            except Exception as e:
-                print(f"Error deleting directory {directory}: {e}")
-        else:
+        # rmtree reports missing paths and non-directories itself, so no isdir() stat is needed first
+        try:
+            shutil.rmtree(directory)
+            print(f"Deleted directory: {directory}")
+        except (FileNotFoundError, NotADirectoryError):
             print(f"Directory not found or not a directory: {directory}")
+        except Exception as e:
+            print(f"Error deleting directory {directory}: {e}")
@@ -41,11 +41,14 @@ def copy_and_rename_csv(root_dir, csv_filename="buildings_data.csv", target_subd
     print(f"Looking for: {csv_filename} in '{target_subdir}' subdirectories")
     print("=" * 60)
     
-    # Iterate through all subdirectories in root_dir
-    for item in root_path.iterdir():
-        if item.is_dir():
-            folder_name = item.name
-            csv_source_path = item / target_subdir / csv_filename
+    # Iterate through all subdirectories in root_dir; scandir entries cache their file type
+    with os.scandir(root_path) as entries:
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            
+            folder_name = entry.name
+            csv_source_path = Path(entry.path, target_subdir, csv_filename)
             csv_target_path = root_path / f"{folder_name}.csv"
             
             results["total_processed"] += 1
@@ -114,7 +117,7 @@ def copy_and_rename_csv(root_dir, csv_filename="buildings_data.csv", target_subd
     return results
 
 def copy_and_rename_csv_advanced(root_dir, csv_filename="buildings_data.csv", target_subdir="translated", 
-                                 overwrite=True, backup=False):
+                                 overwrite=True, backup=False, folder_names=None):
     """
     Advanced version with more options.
     
@@ -124,6 +127,7 @@ def copy_and_rename_csv_advanced(root_dir, csv_filename="buildings_data.csv", ta
         target_subdir (str): Subdirectory name where CSV files are located
         overwrite (bool): Whether to overwrite existing files (default: True)
         backup (bool): Whether to create backup of existing files (default: False)
+        folder_names (list): Only handle these subdirectories of root_dir (default: all subdirectories)
     
     Returns:
         dict: Summary of operations performed
@@ -151,62 +155,64 @@ def copy_and_rename_csv_advanced(root_dir, csv_filename="buildings_data.csv", ta
     print(f"Create backups: {backup}")
     print("=" * 60)
     
-    for item in root_path.iterdir():
-        if item.is_dir():
-            folder_name = item.name
-            csv_source_path = item / target_subdir / csv_filename
-            csv_target_path = root_path 
-            
-            results["total_processed"] += 1
-            
-            print(f"Processing folder: {folder_name}")
+    # Every subdirectory unless the caller names the folders to handle
+    if folder_names is None:
+        with os.scandir(root_path) as entries:
+            folder_names = [entry.name for entry in entries if entry.is_dir()]
+    
+    for folder_name in folder_names:
+        csv_source_path = root_path / folder_name / target_subdir / csv_filename
+        csv_target_path = root_path / f"{folder_name}.csv"
+        
+        results["total_processed"] += 1
+        
+        print(f"Processing folder: {folder_name}")
+        
+        if not csv_source_path.exists():
+            results["skipped_files"].append({
+                "folder": folder_name,
+                "reason": "Source file not found"
+            })
+            print(f"  ⚠ Skipped: Source file not found -> {csv_source_path}")
+            continue
+        
+        # Handle existing target file
+        if csv_target_path.exists():
+            if backup:
+                backup_path = root_path / f"{folder_name}_backup_{int(Path().stat().st_mtime)}.csv"
+                try:
+                    shutil.copy2(csv_target_path, backup_path)
+                    results["backed_up_files"].append(str(backup_path))
+                    print(f"  📁 Backup created: {backup_path.name}")
+                except Exception as e:
+                    print(f"  ⚠ Backup failed: {e}")
             
-            if not csv_source_path.exists():
+            if not overwrite:
                 results["skipped_files"].append({
                     "folder": folder_name,
-                    "reason": "Source file not found"
+                    "reason": "Target file exists and overwrite=False"
                 })
-                print(f"  ⚠ Skipped: Source file not found -> {csv_source_path}")
+                print(f"  ⚠ Skipped: Target file exists")
                 continue
+        
+        # Move the file; os.replace is a metadata-only rename on the same filesystem
+        try:
+            os.replace(csv_source_path, csv_target_path)
+            results["copied_files"].append({
+                "folder": folder_name,
+                "source": str(csv_source_path),
+                "target": str(csv_target_path)
+            })
+            print(f"  ✓ Successfully copied to: {csv_target_path.name}")
             
-            # Handle existing target file
-            if csv_target_path.exists():
-                if backup:
-                    backup_path = root_path / f"{folder_name}_backup_{int(Path().stat().st_mtime)}.csv"
-                    try:
-                        shutil.copy2(csv_target_path, backup_path)
-                        results["backed_up_files"].append(str(backup_path))
-                        print(f"  📁 Backup created: {backup_path.name}")
-                    except Exception as e:
-                        print(f"  ⚠ Backup failed: {e}")
-                
-                if not overwrite:
-                    results["skipped_files"].append({
-                        "folder": folder_name,
-                        "reason": "Target file exists and overwrite=False"
-                    })
-                    print(f"  ⚠ Skipped: Target file exists")
-                    continue
-            
-            # Copy the file
-            try:
-                shutil.copy2(csv_source_path, csv_target_path)
-                results["copied_files"].append({
-                    "folder": folder_name,
-                    "source": str(csv_source_path),
-                    "target": str(csv_target_path)
-                })
-                os.rename(csv_source_path, csv_target_path / f"{folder_name}.csv")
-                print(f"  ✓ Successfully copied to: {csv_target_path.name}")
-                
-            except Exception as e:
-                results["failed_files"].append({
-                    "folder": folder_name,
-                    "error": str(e)
-                })
-                print(f"  ✗ Failed to copy: {e}")
-            
-            print()
+        except Exception as e:
+            results["failed_files"].append({
+                "folder": folder_name,
+                "error": str(e)
+            })
+            print(f"  ✗ Failed to copy: {e}")
+        
+        print()
     
     # Print summary
     print("=" * 60)
@@ -270,6 +276,13 @@ This will copy files like:
         help='Create backup of existing files before overwriting'
     )
     
+    parser.add_argument(
+        '--folder',
+        nargs='+',
+        default=None,
+        help='Only handle these subdirectories of root_dir (default: all subdirectories)'
+    )
+    
     args = parser.parse_args()
     
     # Run the function
@@ -278,7 +291,8 @@ This will copy files like:
         csv_filename=args.csv_name,
         target_subdir=args.subdir,
         overwrite=not args.no_overwrite,
-        backup=args.backup
+        backup=args.backup,
+        folder_names=args.folder
     )
     
     if result["success"]:
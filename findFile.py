@@ -1,54 +1,153 @@
 import os
+import io
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 
-def find_and_group_files(root_path, extensions=None):
+# Line count from which txt files are parsed with NumPy instead of a per-line float() loop
+LARGE_TXT_LINES = 1000
+
+def _suffix(name):
+    """Lowercase file suffix of a file name, with the same rules as PurePath.suffix"""
+    dot = name.rfind('.')
+    if 0 < dot < len(name) - 1:
+        return name[dot:].lower()
+    return ''
+
+def _walk_files(directory):
     """
-    Find and group files by directory with specified extensions.
+    Walk a directory tree with os.scandir, returning (directory, file_path, file_name) strings.
+    
+    Like Path.rglob('*'), symlinked directories are not descended into, but
+    symlinked files are reported. DirEntry serves names and file types from
+    the directory listing, so no per-file Path objects or extra stats are needed.
+    """
+    files = []
+    stack = [directory]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        files.append((directory, entry.path, entry.name))
+        except OSError:
+            continue
+    return files
+
+def _iter_files(root, max_workers=None):
+    """Yield (directory, file_path, file_name) for every file under root, scanning top-level subtrees in threads"""
+    subdirs = []
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file():
+                    yield root, entry.path, entry.name
+    except OSError:
+        return
+    
+    # Directory listing is syscall-latency bound, so overlapping the subtree walks hides most of the wait
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for files in executor.map(_walk_files, subdirs):
+            yield from files
+
+def _scan(root_path, extensions):
+    """
+    Walk root_path once and index matching files as {directory: {extension: [file paths]}}.
     
     Args:
         root_path (str): Root directory path to search
-        extensions (list): List of file extensions to search for
-                          Default: ['.obj', '.txt', '.geojson']
+        extensions (frozenset): Lowercase file extensions (with leading dot) to keep
     
     Returns:
-        list: List of lists, each containing grouped files from same directory
+        dict: Files grouped by directory and extension, or None if root_path does not exist
     """
-    if extensions is None:
-        extensions = ['.obj', '.txt', '.geojson']
-    
-    # Convert to lowercase for case-insensitive matching
-    extensions = [ext.lower() for ext in extensions]
-    
-    # Dictionary to group files by directory
-    files_by_dir = defaultdict(list)
-    
     # Convert root_path to Path object
     root = Path(root_path)
     
     # Check if root path exists
     if not root.exists():
         print(f"Error: Root path '{root_path}' does not exist.")
-        return []
+        return None
+    
+    # Dictionary to group files by directory and extension
+    files_by_dir = defaultdict(lambda: defaultdict(list))
     
     # Walk through all subdirectories
-    for file_path in root.rglob('*'):
-        if file_path.is_file():
-            # Check if file has one of the target extensions
-            if file_path.suffix.lower() in extensions:
-                # Group by parent directory
-                parent_dir = file_path.parent
-                files_by_dir[parent_dir].append(str(file_path))
-    
-    # Convert to list of lists and sort for consistent output
+    for parent_dir, file_path, file_name in _iter_files(str(root)):
+        # Check if file has one of the target extensions
+        extension = _suffix(file_name)
+        if extension in extensions:
+            files_by_dir[parent_dir][extension].append(file_path)
+    
+    return files_by_dir
+
+def _grouped_files(files_by_dir, sort=True):
+    """Turn a _scan index into a list of file lists, one per directory (sorted unless sort is False)"""
+    # Sort directories for consistent output (in path order, as Path sorting does); otherwise keep walk order
+    directories = files_by_dir.keys()
+    if sort:
+        directories = sorted(directories, key=lambda d: Path(d).parts)
+    
+    # Convert to list of lists
     result = []
-    for directory in sorted(files_by_dir.keys()):
-        # Sort files within each directory
-        sorted_files = sorted(files_by_dir[directory])
-        result.append(sorted_files)
+    for directory in directories:
+        group = [file_path for files in files_by_dir[directory].values() for file_path in files]
+        if sort:
+            # Sort files within each directory in place
+            group.sort()
+        result.append(group)
     
     return result
 
+def _complete_sets(files_by_dir, required_extensions):
+    """Turn a _scan index into file sets for directories that have every required extension"""
+    # Find directories that have all required extensions
+    result = []
+    for directory, extensions_dict in files_by_dir.items():
+        # Check if this directory has all required extensions
+        if all(ext in extensions_dict for ext in required_extensions):
+            # Create a group with one file from each required extension
+            group = []
+            for ext in required_extensions:
+                # Take the first file of each type (you can modify this logic)
+                group.append(extensions_dict[ext][0])
+            result.append(group)
+    
+    # Sort result by directory path
+    result.sort(key=lambda x: x[0])
+    
+    return result
+
+def find_and_group_files(root_path, extensions=None, sort=True):
+    """
+    Find and group files by directory with specified extensions.
+    
+    Args:
+        root_path (str): Root directory path to search
+        extensions (list): List of file extensions to search for
+                          Default: ['.obj', '.txt', '.geojson']
+        sort (bool): Sort directories and files for a consistent order; pass False
+                     to skip the sorting when the order does not matter
+    
+    Returns:
+        list: List of lists, each containing grouped files from same directory
+    """
+    if extensions is None:
+        extensions = ['.obj', '.txt', '.geojson']
+    
+    # Convert to lowercase for case-insensitive matching; a frozenset gives O(1) membership tests
+    files_by_dir = _scan(root_path, frozenset(ext.lower() for ext in extensions))
+    if files_by_dir is None:
+        return []
+    
+    return _grouped_files(files_by_dir, sort)
+
 def find_complete_sets(root_path, required_extensions=None):
     """
     Find directories that contain ALL required file types.
@@ -64,45 +163,44 @@ def find_complete_sets(root_path, required_extensions=None):
     if required_extensions is None:
         required_extensions = ['.obj', '.txt', '.geojson']
     
-    # Convert to lowercase for case-insensitive matching
+    # Convert to lowercase for case-insensitive matching; the list keeps the output order
     required_extensions = [ext.lower() for ext in required_extensions]
-    
-    # Dictionary to group files by directory and extension
-    files_by_dir = defaultdict(lambda: defaultdict(list))
-    
-    # Convert root_path to Path object
-    root = Path(root_path)
-    
-    # Check if root path exists
-    if not root.exists():
-        print(f"Error: Root path '{root_path}' does not exist.")
+    files_by_dir = _scan(root_path, frozenset(required_extensions))
+    if files_by_dir is None:
         return []
     
-    # Walk through all subdirectories
-    for file_path in root.rglob('*'):
-        if file_path.is_file():
-            # Check if file has one of the target extensions
-            if file_path.suffix.lower() in required_extensions:
-                parent_dir = file_path.parent
-                extension = file_path.suffix.lower()
-                files_by_dir[parent_dir][extension].append(str(file_path))
+    return _complete_sets(files_by_dir, required_extensions)
+
+def scan_all(root_path, extensions=None):
+    """
+    Run find_and_group_files and find_complete_sets over a single walk of the tree.
     
-    # Find directories that have all required extensions
-    result = []
-    for directory, extensions_dict in files_by_dir.items():
-        # Check if this directory has all required extensions
-        if all(ext in extensions_dict for ext in required_extensions):
-            # Create a group with one file from each required extension
-            group = []
-            for ext in required_extensions:
-                # Take the first file of each type (you can modify this logic)
-                group.append(extensions_dict[ext][0])
-            result.append(group)
+    Args:
+        root_path (str): Root directory path to search
+        extensions (list): List of file extensions to search for (and require in complete sets)
+                          Default: ['.obj', '.txt', '.geojson']
     
-    # Sort result by directory path
-    result.sort(key=lambda x: x[0])
+    Returns:
+        tuple: (grouped files, complete sets), as returned by the two functions
+    """
+    if extensions is None:
+        extensions = ['.obj', '.txt', '.geojson']
     
-    return result
+    extensions = [ext.lower() for ext in extensions]
+    files_by_dir = _scan(root_path, frozenset(extensions))
+    if files_by_dir is None:
+        return [], []
+    
+    return _grouped_files(files_by_dir), _complete_sets(files_by_dir, extensions)
+
+def _read_text(file_path):
+    """Read a whole UTF-8 text file with one unbuffered os.read (no BufferedReader/TextIOWrapper setup)"""
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        data = os.read(fd, os.fstat(fd).st_size)
+    finally:
+        os.close(fd)
+    return data.decode('utf-8')
 
 def read_and_convert_txt(file_path):
     """
@@ -115,11 +213,20 @@ def read_and_convert_txt(file_path):
         list: List of float numbers with commas replaced by dots
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
+        text = _read_text(file_path)
+        
+        # Large files: parse every line in C; any malformed line falls back to the loop below for its warning
+        if text.count('\n') >= LARGE_TXT_LINES:
+            try:
+                values = np.loadtxt(io.StringIO(text.replace(',', '.')), dtype=np.float64,
+                                    comments=None, ndmin=1)
+                if values.ndim == 1:
+                    return values.tolist()
+            except ValueError:
+                pass
         
         result = []
-        for line in lines:
+        for line in text.splitlines():
             # Strip whitespace and newlines
             line = line.strip()
             
@@ -159,8 +266,7 @@ def read_and_convert_txt_as_strings(file_path):
         list: List of strings with commas replaced by dots
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
+        lines = _read_text(file_path).splitlines()
         
         result = []
         for line in lines:
@@ -184,20 +290,24 @@ def read_and_convert_txt_as_strings(file_path):
         print(f"Error reading file: {e}")
         return []
 
-def batch_process_txt_files(file_paths):
+def batch_process_txt_files(file_paths, max_workers=None):
     """
     Process multiple txt files at once.
     
     Args:
         file_paths (list): List of file paths to process
+        max_workers (int): Number of reader threads (default: up to 32, one per file)
     
     Returns:
         dict: Dictionary with file paths as keys and converted lists as values
     """
-    results = {}
-    for file_path in file_paths:
-        results[file_path] = read_and_convert_txt(file_path)
-    return results
+    file_paths = list(file_paths)
+    if max_workers is None:
+        max_workers = min(32, len(file_paths)) or 1
+    
+    # Reads are I/O bound, so overlapping them in threads hides most of the latency
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(file_paths, executor.map(read_and_convert_txt, file_paths)))
 
 # # Example usage and testing
 # if __name__ == "__main__":
@@ -10,15 +10,73 @@ Date: 2025-05-26
 
 import os
 import sys
-import xml.etree.ElementTree as ET
+import shutil
+import tempfile
 from pathlib import Path
 from datetime import datetime
 import argparse
 import re
+from itertools import repeat
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+# lxml parses and serializes in C (libxml2); fall back to the standard library if it is missing
+try:
+    from lxml import etree as ET
+    USING_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    USING_LXML = False
+
+
+# Read buffer for CityGML files; large reads mean far fewer read() syscalls on multi-MB files
+READ_BUFFER_SIZE = 1 << 20
+
+# Write buffer for the merged file, which is written piece by piece
+WRITE_BUFFER_SIZE = 1 << 20
+
+# ID prefix written by the converter, and its form in xlink:href references
+UUID_PREFIX = 'UUID_'
+UUID_REFERENCE_PREFIX = '#UUID_'
+
+# Number of city objects serialized together; bounds the parsed elements held per file
+SERIALIZE_BATCH_SIZE = 256
+
+# Chunk size fed to the parser when only the root element of a file is needed
+HEADER_READ_SIZE = 1 << 12
+
+# Start workers from a clean server process instead of forking the caller, which is unsafe
+# when the merger runs inside a multithreaded program such as main.py
+MP_CONTEXT = mp.get_context('forkserver') if 'forkserver' in mp.get_all_start_methods() else None
+
+# Merger shared by the worker processes, set once per worker by _init_worker
+_worker_merger = None
+
+def _init_worker(merger):
+    """Process pool initializer: keep one merger instance per worker"""
+    global _worker_merger
+    _worker_merger = merger
+    # Namespace registrations are global state that a started (not forked) worker does not inherit
+    merger.register_namespaces()
+
+def _process_file_worker(file_path, prefix, author_name):
+    """Parse and rewrite a single CityGML file in a worker, returning (result, error)"""
+    try:
+        return _worker_merger.process_citygml_file(file_path, prefix, author_name), None
+    except Exception as e:
+        return None, str(e)
 
 
 class CityGMLMerger:
-    def __init__(self):
+    def __init__(self, verbose=False):
+        # Print every rewritten ID/reference/description (slow on large files)
+        self.verbose = verbose
+        
+        # Counts of rewrites, reported once per merge instead of per element
+        self.updated_ids = 0
+        self.updated_references = 0
+        self.updated_descriptions = 0
+        
         # Define CityGML namespaces
         self.namespaces = {
             'gml': 'http://www.opengis.net/gml',
@@ -32,7 +90,30 @@ class CityGMLMerger:
             'xsi': 'http://www.w3.org/2001/XMLSchema-instance'
         }
         
-        # Register namespaces for ElementTree
+        self.register_namespaces()
+        
+        # Fully-qualified tag and attribute names, built once instead of on every lookup
+        gml = self.namespaces['gml']
+        core = self.namespaces['core']
+        self.TAG_CITYMODEL = f"{{{core}}}CityModel"
+        self.TAG_CITYOBJECTMEMBER = f"{{{core}}}cityObjectMember"
+        self.TAG_GML_NAME = f"{{{gml}}}name"
+        self.TAG_GML_DESCRIPTION = f"{{{gml}}}description"
+        self.TAG_GML_BOUNDEDBY = f"{{{gml}}}boundedBy"
+        self.TAG_GML_ENVELOPE = f"{{{gml}}}Envelope"
+        self.TAG_GML_LOWERCORNER = f"{{{gml}}}lowerCorner"
+        self.TAG_GML_UPPERCORNER = f"{{{gml}}}upperCorner"
+        self.ATTR_GML_ID = f"{{{gml}}}id"
+        self.ATTR_XLINK_HREF = f"{{{self.namespaces['xlink']}}}href"
+        
+        # Descendant search paths, built once so repeated find() calls reuse the same path string
+        self.PATH_GML_BOUNDEDBY = f".//{self.TAG_GML_BOUNDEDBY}"
+        self.PATH_GML_ENVELOPE = f".//{self.TAG_GML_ENVELOPE}"
+        self.PATH_GML_LOWERCORNER = f".//{self.TAG_GML_LOWERCORNER}"
+        self.PATH_GML_UPPERCORNER = f".//{self.TAG_GML_UPPERCORNER}"
+
+    def register_namespaces(self):
+        """Register the CityGML namespace prefixes for serialization"""
         for prefix, uri in self.namespaces.items():
             ET.register_namespace(prefix, uri)
 
@@ -58,30 +139,117 @@ class CityGMLMerger:
         
         return sorted(gml_files)
 
-    def validate_citygml_file(self, file_path):
+    def parse_citygml_file(self, file_path):
         """
-        Validate if the file is a valid CityGML file.
+        Parse a CityGML file through a large read buffer.
         
         Args:
-            file_path (Path): Path to the file to validate
+            file_path (Path): Path to the file to parse
             
         Returns:
-            bool: True if valid CityGML file, False otherwise
+            ET.ElementTree: Parsed document
+        """
+        with open(file_path, 'rb', buffering=READ_BUFFER_SIZE) as f:
+            return ET.parse(f)
+
+    def read_root_element(self, file_path):
+        """
+        Read only the root element (tag and attributes) of an XML file.
+        
+        Args:
+            file_path (Path): Path to the file to read
+            
+        Returns:
+            Detached copy of the root element, without its children
+        """
+        # Feed the file in small chunks and stop at the first start event, so the rest is never parsed
+        parser = ET.XMLPullParser(events=('start',))
+        with open(file_path, 'rb') as f:
+            while True:
+                chunk = f.read(HEADER_READ_SIZE)
+                if not chunk:
+                    break
+                parser.feed(chunk)
+                for event, elem in parser.read_events():
+                    return ET.Element(elem.tag, dict(elem.attrib))
+        
+        # Reached the end without a root element; let the parser report why
+        parser.close()
+        return None
+
+    def read_citygml_header(self, file_path):
+        """
+        Read the root element and the model envelope from the start of a CityGML file.
+        
+        The file is fed to the parser in small chunks only until the first gml:boundedBy is complete,
+        which for CityGML is the envelope right after the root element.
+        
+        Args:
+            file_path (Path): Path to the file to read
+            
+        Returns:
+            tuple: (detached copy of the root element, bounds dict or None)
+        """
+        root = None
+        parser = ET.XMLPullParser(events=('start', 'end'))
+        with open(file_path, 'rb') as f:
+            while True:
+                chunk = f.read(HEADER_READ_SIZE)
+                if not chunk:
+                    break
+                parser.feed(chunk)
+                for event, elem in parser.read_events():
+                    if root is None:
+                        root = ET.Element(elem.tag, dict(elem.attrib))
+                        
+                        # Not a CityModel; the caller rejects it, so there is no need to read further
+                        if not root.tag.endswith('CityModel'):
+                            return root, None
+                    elif event == 'end' and elem.tag == self.TAG_GML_BOUNDEDBY:
+                        # The first boundedBy in the file is the model envelope
+                        return root, self.extract_envelope_bounds(elem)
+        
+        # Reached the end without an envelope; let the parser report a broken file
+        parser.close()
+        return root, None
+
+    def load_citygml_file(self, file_path):
+        """
+        Read the header of a file and keep it only if it is a CityGML file.
+        
+        Only the start of the file is read; the content is streamed later while merging.
+        
+        Args:
+            file_path (Path): Path to the file to load
+            
+        Returns:
+            tuple: (root element, bounds dict or None), or None if the file is not valid CityGML
         """
         try:
-            tree = ET.parse(file_path)
-            root = tree.getroot()
+            root, bounds = self.read_citygml_header(file_path)
             
             # Check if root element is CityModel
-            if root.tag.endswith('CityModel'):
-                return True
-            return False
+            if root is not None and root.tag.endswith('CityModel'):
+                return root, bounds
+            return None
         except ET.ParseError as e:
             print(f"Warning: XML parsing error in {file_path}: {e}")
-            return False
+            return None
         except Exception as e:
             print(f"Warning: Error validating {file_path}: {e}")
-            return False
+            return None
+
+    def validate_citygml_file(self, file_path):
+        """
+        Validate if the file is a valid CityGML file.
+        
+        Args:
+            file_path (Path): Path to the file to validate
+            
+        Returns:
+            bool: True if valid CityGML file, False otherwise
+        """
+        return self.load_citygml_file(file_path) is not None
 
     def calculate_merged_bounds(self, bounds_list):
         """
@@ -128,18 +296,30 @@ class CityGMLMerger:
         Returns:
             dict: Bounding box information
         """
-        try:
-            # Find boundedBy element
-            bounded_by = root.find('.//{http://www.opengis.net/gml}boundedBy')
-            if bounded_by is None:
-                return None
+        # Find boundedBy element
+        bounded_by = root.find(self.PATH_GML_BOUNDEDBY)
+        if bounded_by is None:
+            return None
+        
+        return self.extract_envelope_bounds(bounded_by)
+
+    def extract_envelope_bounds(self, bounded_by):
+        """
+        Extract bounding box information from a gml:boundedBy element.
+        
+        Args:
+            bounded_by: gml:boundedBy element
             
-            envelope = bounded_by.find('.//{http://www.opengis.net/gml}Envelope')
+        Returns:
+            dict: Bounding box information
+        """
+        try:
+            envelope = bounded_by.find(self.PATH_GML_ENVELOPE)
             if envelope is None:
                 return None
             
-            lower_corner = envelope.find('.//{http://www.opengis.net/gml}lowerCorner')
-            upper_corner = envelope.find('.//{http://www.opengis.net/gml}upperCorner')
+            lower_corner = envelope.find(self.PATH_GML_LOWERCORNER)
+            upper_corner = envelope.find(self.PATH_GML_UPPERCORNER)
             
             if lower_corner is None or upper_corner is None:
                 return None
@@ -162,20 +342,23 @@ class CityGMLMerger:
             print(f"Warning: Error parsing bounds: {e}")
             return None
 
-    def extract_root_attributes(self, file_paths):
+    def extract_root_attributes(self, file_paths, roots=None):
         """
         Extract root attributes from the first valid CityGML file to use as template.
         
         Args:
             file_paths (list): List of CityGML file paths
+            roots (list): Already read root elements for file_paths (optional)
             
         Returns:
             dict: Root element attributes
         """
+        if roots:
+            return dict(roots[0].attrib)
+        
         for file_path in file_paths:
             try:
-                tree = ET.parse(file_path)
-                root = tree.getroot()
+                root = self.read_root_element(file_path)
                 
                 # Return the attributes from the first valid file
                 return dict(root.attrib)
@@ -192,165 +375,304 @@ class CityGMLMerger:
                 'http://www.opengis.net/citygml/generics/2.0 http://schemas.opengis.net/citygml/generics/2.0/generics.xsd'
         }
 
-    def update_ids_with_prefix(self, element, prefix):
+    def rewrite_city_object(self, element, prefix, author_name="Fairuz Akmal Pradana"):
         """
-        Recursively update all gml:id attributes that start with 'UUID_' to use custom prefix.
+        Rewrite IDs, ID references and descriptions of a city object.
+        
+        Every attribute that starts with 'UUID_' (gml:id, id and other references) and every
+        xlink:href that starts with '#UUID_' gets the custom prefix instead, and
+        gml:description texts containing "created by converter" get the author name.
         
         Args:
-            element: XML element to process
+            element: XML element to process (processed together with all its descendants)
             prefix (str): New prefix to replace 'UUID_'
+            author_name (str): Name to replace "converter" with
+        """
+        gml_id_attr = self.ATTR_GML_ID
+        xlink_href_attr = self.ATTR_XLINK_HREF
+        description_tag = self.TAG_GML_DESCRIPTION
+        
+        # Replacement prefixes are built once; matched values are rebuilt by slicing off the old prefix
+        id_prefix = f'{prefix}_'
+        reference_prefix = f'#{prefix}_'
+        
+        # lxml skips comments and processing instructions itself; in ElementTree they have no attributes
+        elements = element.iter(ET.Element) if USING_LXML else element.iter()
+        
+        for elem in elements:
+            for attr_name, attr_value in elem.items():
+                if attr_value.startswith(UUID_PREFIX):
+                    new_value = id_prefix + attr_value[len(UUID_PREFIX):]
+                    elem.set(attr_name, new_value)
+                    if attr_name in (gml_id_attr, 'id'):
+                        self.updated_ids += 1
+                        if self.verbose:
+                            print(f"  Updated ID: {attr_value} -> {new_value}")
+                    else:
+                        self.updated_references += 1
+                        if self.verbose:
+                            print(f"  Updated attribute {attr_name}: {attr_value} -> {new_value}")
+                elif attr_name == xlink_href_attr and attr_value.startswith(UUID_REFERENCE_PREFIX):
+                    new_value = reference_prefix + attr_value[len(UUID_REFERENCE_PREFIX):]
+                    elem.set(attr_name, new_value)
+                    self.updated_references += 1
+                    if self.verbose:
+                        print(f"  Updated reference: {attr_value} -> {new_value}")
+        
+        # Only visit gml:description elements; the tag filter is applied in C
+        for elem in element.iter(description_tag):
+            if elem.text and 'created by converter' in elem.text:
+                old_text = elem.text
+                new_text = elem.text.replace('created by converter', f'created by {author_name}')
+                elem.text = new_text
+                self.updated_descriptions += 1
+                if self.verbose:
+                    print(f"  Updated description: '{old_text}' -> '{new_text}'")
+
+    def stream_city_objects(self, file_path):
         """
-        # Update gml:id attribute if it exists and starts with 'UUID_'
-        gml_id = element.get('{http://www.opengis.net/gml}id')
-        if gml_id and gml_id.startswith('UUID_'):
-            new_id = gml_id.replace('UUID_', f'{prefix}_', 1)
-            element.set('{http://www.opengis.net/gml}id', new_id)
-            print(f"  Updated ID: {gml_id} -> {new_id}")
+        Stream the cityObjectMember elements of a CityGML file.
         
-        # Also check for regular 'id' attribute (fallback)
-        regular_id = element.get('id')
-        if regular_id and regular_id.startswith('UUID_'):
-            new_id = regular_id.replace('UUID_', f'{prefix}_', 1)
-            element.set('id', new_id)
-            print(f"  Updated ID: {regular_id} -> {new_id}")
+        The file is read incrementally with iterparse, and each member is freed (with everything
+        before it on lxml) once the caller is done with it, so the whole document is never held in memory.
+        A member the caller moves to another parent is left to the caller.
         
-        # Recursively process all child elements
-        for child in element:
-            self.update_ids_with_prefix(child, prefix)
+        Args:
+            file_path (Path): Path to the CityGML file
+            
+        Yields:
+            cityObjectMember elements, one at a time
+        """
+        with open(file_path, 'rb', buffering=READ_BUFFER_SIZE) as f:
+            if USING_LXML:
+                # Only report the elements needed here, so no Python objects are created for the rest
+                events = ET.iterparse(f, events=('end',), tag=self.TAG_CITYOBJECTMEMBER)
+            else:
+                events = ET.iterparse(f, events=('end',))
+            
+            for event, elem in events:
+                if elem.tag != self.TAG_CITYOBJECTMEMBER:
+                    continue
+                
+                if not USING_LXML:
+                    yield elem
+                    elem.clear()
+                    continue
+                
+                # The caller may move the member out of the tree, so remember where it was
+                parent, previous = elem.getparent(), elem.getprevious()
+                yield elem
+                
+                # Drop the member and its preceding siblings; later elements may already be parsed
+                if elem.getparent() is parent:
+                    elem.clear()
+                    parent.remove(elem)
+                if previous is not None:
+                    del parent[:parent.index(previous) + 1]
 
-    def update_id_references(self, element, prefix):
+    def process_citygml_file(self, file_path, prefix, author_name="Fairuz Akmal Pradana"):
         """
-        Update any references to IDs that were changed (like xlink:href attributes).
+        Stream a CityGML file, rewrite its city objects and serialize them.
+        
+        Runs in a worker process; the serialized members are cheap to send back to the parent.
         
         Args:
-            element: XML element to process
-            prefix (str): Prefix used for ID replacement
+            file_path (Path): Path to the CityGML file
+            prefix (str): New prefix to replace 'UUID_'
+            author_name (str): Name to replace "converter" with
+            
+        Returns:
+            tuple: (serialized cityObjectMember elements, number of members,
+                    (updated IDs, updated references, updated descriptions))
         """
-        # Check xlink:href attributes
-        xlink_href = element.get('{http://www.w3.org/1999/xlink}href')
-        if xlink_href and xlink_href.startswith('#UUID_'):
-            new_href = xlink_href.replace('#UUID_', f'#{prefix}_', 1)
-            element.set('{http://www.w3.org/1999/xlink}href', new_href)
-            print(f"  Updated reference: {xlink_href} -> {new_href}")
+        # Count this file's rewrites only; the parent adds them to its own counters
+        self.updated_ids = self.updated_references = self.updated_descriptions = 0
         
-        # Check other potential reference attributes
-        for attr_name, attr_value in element.attrib.items():
-            if isinstance(attr_value, str) and attr_value.startswith('UUID_'):
-                new_value = attr_value.replace('UUID_', f'{prefix}_', 1)
-                element.set(attr_name, new_value)
-                print(f"  Updated attribute {attr_name}: {attr_value} -> {new_value}")
-        
-        # Recursively process all child elements
-        for child in element:
-            self.update_id_references(child, prefix)
+        if USING_LXML:
+            # Members are serialized inside a CityModel declaring every namespace and its tags are cut off,
+            # so members reuse the merged root's declarations instead of repeating their own
+            container = ET.Element(self.TAG_CITYMODEL, nsmap=self.namespaces)
+            
+        pieces = []
+        count = 0
+        for city_object in self.stream_city_objects(file_path):
+            # Drop the source whitespace tail so it is not serialized with the element
+            city_object.tail = None
+            
+            # Update IDs, references and descriptions in one pass
+            if self.verbose:
+                print(f"  Updating IDs and descriptions in {file_path.name}...")
+            self.rewrite_city_object(city_object, prefix, author_name)
+            count += 1
+            
+            if USING_LXML:
+                container.append(city_object)
+                if len(container) >= SERIALIZE_BATCH_SIZE:
+                    pieces.append(self.serialize_members(container))
+                    container = ET.Element(self.TAG_CITYMODEL, nsmap=self.namespaces)
+            else:
+                # ElementTree declares namespaces per serialization, so each member carries its own
+                pieces.append(ET.tostring(city_object, encoding='utf-8'))
+        
+        if USING_LXML and len(container):
+            pieces.append(self.serialize_members(container))
+        
+        counts = (self.updated_ids, self.updated_references, self.updated_descriptions)
+        return b''.join(pieces), count, counts
 
-    def update_descriptions(self, element, author_name="Fairuz Akmal Pradana"):
+    def serialize_members(self, container):
         """
-        Recursively update all gml:description elements that contain "created by converter".
+        Serialize the members of a CityModel container without its own tags.
         
         Args:
-            element: XML element to process
-            author_name (str): Name to replace "converter" with
+            container: CityModel element holding the rewritten cityObjectMember elements
+            
+        Returns:
+            bytes: Serialized members
         """
-        # Check if this is a gml:description element
-        if element.tag == f'{{{self.namespaces["gml"]}}}description':
-            if element.text and 'created by converter' in element.text:
-                old_text = element.text
-                new_text = element.text.replace('created by converter', f'created by {author_name}')
-                element.text = new_text
-                print(f"  Updated description: '{old_text}' -> '{new_text}'")
-        
-        # Recursively process all child elements
-        for child in element:
-            self.update_descriptions(child, author_name)
+        data = ET.tostring(container, encoding='utf-8')
+        return data[data.index(b'>') + 1:data.rindex(b'</')]
 
-    def create_merged_citygml(self, file_paths, output_name="Merged_CityModel", author_name="Fairuz Akmal Pradana"):
+    def create_merged_root(self, file_paths, output_name="Merged_CityModel", roots=None, bounds_list=None):
         """
-        Create a merged CityGML document from multiple files.
+        Create the merged CityModel element with its name and merged envelope, without city objects.
         
         Args:
             file_paths (list): List of CityGML file paths
-            output_name (str): Name for the merged city model (also used as ID prefix)
-            author_name (str): Author name to replace "converter" in descriptions
+            output_name (str): Name for the merged city model
+            roots (list): Already read root elements for file_paths (optional)
+            bounds_list (list): Bounding boxes of the files (optional)
             
         Returns:
-            ET.ElementTree: Merged CityGML document
+            Merged CityModel element
         """
         # Extract root attributes from first file to preserve original namespace declarations
-        root_attribs = self.extract_root_attributes(file_paths)
+        root_attribs = self.extract_root_attributes(file_paths, roots)
         
-        # Create root element with preserved attributes
-        merged_root = ET.Element(f"{{{self.namespaces['core']}}}CityModel", root_attribs)
+        # Create root element with preserved attributes; with lxml, declare every namespace on the
+        # root so merged members reuse these declarations instead of repeating their own
+        if USING_LXML:
+            merged_root = ET.Element(self.TAG_CITYMODEL, root_attribs, nsmap=self.namespaces)
+        else:
+            merged_root = ET.Element(self.TAG_CITYMODEL, root_attribs)
         
         # Add name element
-        name_elem = ET.SubElement(merged_root, f"{{{self.namespaces['gml']}}}name")
+        name_elem = ET.SubElement(merged_root, self.TAG_GML_NAME)
         name_elem.text = output_name
         
-        # Collect all bounds and city objects
-        all_bounds = []
-        city_objects = []
-        
-        print(f"Processing {len(file_paths)} CityGML files...")
-        
-        for i, file_path in enumerate(file_paths, 1):
-            print(f"Processing file {i}/{len(file_paths)}: {file_path.name}")
-            
-            try:
-                tree = ET.parse(file_path)
-                root = tree.getroot()
-                
-                # Extract bounds
-                bounds = self.extract_bounds(root)
-                if bounds:
-                    all_bounds.append(bounds)
-                
-                # Extract all cityObjectMember elements
-                for city_object in root.findall(f".//{{{self.namespaces['core']}}}cityObjectMember"):
-                    # Create a copy of the city object to avoid modifying the original
-                    city_object_copy = ET.fromstring(ET.tostring(city_object))
-                    
-                    # Update IDs with custom prefix
-                    print(f"  Updating IDs in {file_path.name}...")
-                    self.update_ids_with_prefix(city_object_copy, output_name)
-                    self.update_id_references(city_object_copy, output_name)
-                    
-                    # Update descriptions
-                    print(f"  Updating descriptions in {file_path.name}...")
-                    self.update_descriptions(city_object_copy, author_name)
-                    
-                    city_objects.append(city_object_copy)
-                
-            except Exception as e:
-                print(f"Error processing {file_path}: {e}")
-                continue
-        
         # Calculate merged bounds
+        all_bounds = [bounds for bounds in bounds_list or [] if bounds]
         if all_bounds:
             merged_bounds = self.calculate_merged_bounds(all_bounds)
             
             # Create boundedBy element
-            bounded_by = ET.SubElement(merged_root, f"{{{self.namespaces['gml']}}}boundedBy")
-            envelope = ET.SubElement(bounded_by, f"{{{self.namespaces['gml']}}}Envelope")
+            bounded_by = ET.SubElement(merged_root, self.TAG_GML_BOUNDEDBY)
+            envelope = ET.SubElement(bounded_by, self.TAG_GML_ENVELOPE)
             envelope.set('srsName', merged_bounds['srs'])
             envelope.set('srsDimension', '3')
             
-            lower_corner = ET.SubElement(envelope, f"{{{self.namespaces['gml']}}}lowerCorner")
+            lower_corner = ET.SubElement(envelope, self.TAG_GML_LOWERCORNER)
             lower_corner.text = f"{merged_bounds['lower_x']} {merged_bounds['lower_y']} {merged_bounds['lower_z']}"
             
-            upper_corner = ET.SubElement(envelope, f"{{{self.namespaces['gml']}}}upperCorner")
+            upper_corner = ET.SubElement(envelope, self.TAG_GML_UPPERCORNER)
             upper_corner.text = f"{merged_bounds['upper_x']} {merged_bounds['upper_y']} {merged_bounds['upper_z']}"
         
-        # Add all city objects to merged model
-        for city_object in city_objects:
-            merged_root.append(city_object)
+        return merged_root
+
+    def write_merged_citygml(self, output_file, file_paths, output_name="Merged_CityModel",
+                             author_name="Fairuz Akmal Pradana", roots=None, bounds_list=None, max_workers=None):
+        """
+        Merge CityGML files and stream the result into the output file.
+        
+        The merged document is never built in memory: each file's serialized cityObjectMember elements
+        are spooled to a temporary file as they come back from the worker processes (in file order).
+        The CityModel start tag, name and the envelope of the files that merged are then written,
+        followed by the spooled members and the closing tag.
         
-        print(f"Successfully merged {len(city_objects)} city objects from {len(file_paths)} files.")
+        Args:
+            output_file (str): Path for output merged file
+            file_paths (list): List of CityGML file paths
+            output_name (str): Name for the merged city model (also used as ID prefix)
+            author_name (str): Author name to replace "converter" in descriptions
+            roots (list): Already read root elements for file_paths (optional)
+            bounds_list (list): Bounding boxes of the files (optional, read from the files if missing)
+            max_workers (int): Number of worker processes (default: number of CPUs)
+        """
+        if bounds_list is None:
+            bounds_list = [self.read_citygml_header(file_path)[1] for file_path in file_paths]
+        
+        # Indices of the files whose members were written
+        merged = []
+        city_object_count = 0
+        
+        print(f"Processing {len(file_paths)} CityGML files...")
+        
+        workers = max_workers or os.cpu_count() or 1
+        chunksize = max(1, len(file_paths) // (workers * 4))
+        
+        # Members are spooled next to the output until every file is done, so the envelope written
+        # in front of them covers only the files that were actually merged
+        with tempfile.TemporaryFile(dir=Path(output_file).parent) as spool:
+            # Files are independent, so they are parsed and rewritten in parallel; map keeps file order
+            with ProcessPoolExecutor(max_workers=workers, mp_context=MP_CONTEXT,
+                                     initializer=_init_worker, initargs=(self,)) as executor:
+                results = executor.map(_process_file_worker, file_paths, repeat(output_name), repeat(author_name),
+                                       chunksize=chunksize)
+                
+                for i, (file_path, (result, error)) in enumerate(zip(file_paths, results), 1):
+                    print(f"Processing file {i}/{len(file_paths)}: {file_path.name}")
+                    
+                    # Nothing is merged from a file that fails to parse
+                    if error:
+                        print(f"Error processing {file_path}: {error}")
+                        continue
+                    
+                    data, count, (ids, references, descriptions) = result
+                    self.updated_ids += ids
+                    self.updated_references += references
+                    self.updated_descriptions += descriptions
+                    
+                    spool.write(data)
+                    city_object_count += count
+                    merged.append(i - 1)
+            
+            if not merged:
+                raise ValueError("No valid CityGML files found in the directory.")
+            
+            merged_files = [file_paths[j] for j in merged]
+            merged_roots = [roots[j] for j in merged] if roots else None
+            merged_bounds = [bounds_list[j] for j in merged]
+            
+            # Serialize the model element without members and split it around where they go
+            merged_root = self.create_merged_root(merged_files, output_name, merged_roots, merged_bounds)
+            model = ET.tostring(merged_root, encoding='utf-8')
+            split = model.rindex(b'</')
+            prologue, epilogue = model[:split], model[split:]
+            
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            header_comment = f"""<?xml version="1.0" encoding="UTF-8"?>
+<!-- Merged CityGML File -->
+<!-- Generated by CityGML Merger on {timestamp} -->
+<!-- Original files merged into single CityGML document -->
+<!-- UUID_ prefixes replaced with custom prefix -->
+<!-- Descriptions updated with custom author name -->
+"""
+            
+            with open(output_file, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+                f.write(header_comment.encode('utf-8'))
+                f.write(prologue)
+                spool.seek(0)
+                shutil.copyfileobj(spool, f, WRITE_BUFFER_SIZE)
+                f.write(epilogue)
+        
+        print(f"Successfully merged {city_object_count} city objects from {len(merged_files)} files.")
+        print(f"Updated {self.updated_ids} IDs, {self.updated_references} references "
+              f"and {self.updated_descriptions} descriptions")
         print(f"All UUID_ prefixes have been replaced with '{output_name}_'")
         print(f"All descriptions updated to use author name: '{author_name}'")
-        
-        return ET.ElementTree(merged_root)
 
-    def merge_files(self, input_directory, output_file, output_name="Merged_CityModel", author_name="Fairuz Akmal Pradana"):
+    def merge_files(self, input_directory, output_file, output_name="Merged_CityModel", author_name="Fairuz Akmal Pradana",
+                    max_workers=None):
         """
         Main method to merge CityGML files from a directory.
         
@@ -359,17 +681,23 @@ class CityGMLMerger:
             output_file (str): Path for output merged file
             output_name (str): Name for the merged city model (also used as ID prefix)
             author_name (str): Author name to replace "converter" in descriptions
+            max_workers (int): Number of worker processes (default: number of CPUs)
         """
         try:
             # Get all CityGML files
             file_paths = self.get_citygml_files(input_directory)
             print(f"Found {len(file_paths)} potential CityGML files.")
             
-            # Validate files
+            # Validate files by their header, keeping root and envelope; the content is streamed while merging
             valid_files = []
+            valid_roots = []
+            valid_bounds = []
             for file_path in file_paths:
-                if self.validate_citygml_file(file_path):
+                header = self.load_citygml_file(file_path)
+                if header is not None:
                     valid_files.append(file_path)
+                    valid_roots.append(header[0])
+                    valid_bounds.append(header[1])
                 else:
                     print(f"Skipping invalid CityGML file: {file_path}")
             
@@ -380,19 +708,9 @@ class CityGMLMerger:
             print(f"Will replace 'UUID_' prefix with '{output_name}_' in all IDs.")
             print(f"Will replace 'created by converter' with 'created by {author_name}' in descriptions.")
             
-            # Create merged CityGML
-            merged_tree = self.create_merged_citygml(valid_files, output_name, author_name)
-            
-            # Write output file
-            merged_tree.write(
-                output_file,
-                encoding='UTF-8',
-                xml_declaration=True,
-                method='xml'
-            )
-            
-            # Add comment header
-            self.add_header_comment(output_file)
+            # Merge straight into the output file
+            self.write_merged_citygml(output_file, valid_files, output_name, author_name,
+                                      valid_roots, valid_bounds, max_workers)
             
             print(f"Successfully created merged CityGML file: {output_file}")
             
@@ -400,41 +718,24 @@ class CityGMLMerger:
             print(f"Error during merging process: {e}")
             sys.exit(1)
 
-    def add_header_comment(self, output_file):
-        """
-        Add header comment to the output file.
-        
-        Args:
-            output_file (str): Path to output file
-        """
-        try:
-            # Read the file
-            with open(output_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Create header comment
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            header_comment = f"""<?xml version="1.0" encoding="UTF-8"?>
-<!-- Merged CityGML File -->
-<!-- Generated by CityGML Merger on {timestamp} -->
-<!-- Original files merged into single CityGML document -->
-<!-- UUID_ prefixes replaced with custom prefix -->
-<!-- Descriptions updated with custom author name -->
-"""
-            
-            # Replace the XML declaration with our header
-            content = content.replace('<?xml version="1.0" encoding="UTF-8"?>', header_comment, 1)
-            
-            # Write back to file
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(content)
-                
-        except Exception as e:
-            print(f"Warning: Could not add header comment: {e}")
-
+def main(input_directory, output_file, name="Merged_CityModel", author="Fairuz Akmal Pradana",
+         workers=None, verbose=False):
+    """
+    Merge the CityGML files of a directory into a single file.
+    
+    Args:
+        input_directory (str): Directory containing CityGML files to merge
+        output_file (str): Output path for merged CityGML file
+        name (str): Name for the merged city model and prefix for building IDs
+        author (str): Author name to replace "converter" in descriptions
+        workers (int): Number of worker processes (default: number of CPUs)
+        verbose (bool): Print every updated ID, reference and description
+    """
+    merger = CityGMLMerger(verbose=verbose)
+    merger.merge_files(input_directory, output_file, name, author, workers)
 
-def main():
-    """Main function to handle command line arguments and execute merging."""
+def parse_args():
+    """Parse the command line arguments of the merger"""
     parser = argparse.ArgumentParser(
         description='Merge multiple CityGML files into a single file',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -476,12 +777,22 @@ Examples of changes:
         help='Author name to replace "converter" in descriptions (default: Fairuz Akmal Pradana)'
     )
     
-    args = parser.parse_args()
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of worker processes (default: number of CPUs)'
+    )
+    
+    parser.add_argument(
+        '--verbose',
+        action='store_true',
+        help='Print every updated ID, reference and description'
+    )
     
-    # Create merger instance and process files
-    merger = CityGMLMerger()
-    merger.merge_files(args.input_directory, args.output_file, args.name, args.author)
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(args.input_directory, args.output_file, args.name, args.author, args.workers, args.verbose)
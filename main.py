@@ -1,13 +1,38 @@
 import subprocess as sp
+import argparse
+import shlex
 import time
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 from pathlib import Path
 from datetime import datetime
 
 from findFile import find_complete_sets, read_and_convert_txt
 from cacheHandling import delete_directories, delete_files
+from copyNrename import copy_and_rename_csv_advanced
+from semantic_mapping import main as semantic_mapping_main
+from lod2merge import main as lod2merge_main
+
+# Pre-built Go tools; `go run` would recompile the source on every call
+BIN = Path("bin")
+GO_TOOLS = ["objseparator", "translate", "obj2lod2gml"]
+EXE_SUFFIX = ".exe" if os.name == "nt" else ""
+
+def go_binary(name):
+    """Path of the pre-built binary for a Go tool"""
+    return str(BIN / f"{name}{EXE_SUFFIX}")
+
+def build_go_binaries():
+    """Build the Go tools once, rebuilding a binary only if it is missing or older than its source"""
+    BIN.mkdir(exist_ok=True)
+    for name in GO_TOOLS:
+        source = Path(f"{name}.go")
+        binary = Path(go_binary(name))
+        if binary.exists() and binary.stat().st_mtime >= source.stat().st_mtime:
+            continue
+        run_subprocess_with_capture(["go", "build", "-o", str(binary), str(source)], f"Building {name}")
 
 class OutputCapture:
     def __init__(self, log_file='processing.log'):
@@ -18,7 +43,9 @@ class OutputCapture:
     def __enter__(self):
         # Create directory if it doesn't exist
         os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
-        self.log_handle = open(self.log_file, 'w', encoding='utf-8')
+        # Line buffered: child processes write to the same file descriptor directly, so every line
+        # has to reach the file when it is logged to keep the log in execution order
+        self.log_handle = open(self.log_file, 'w', encoding='utf-8', buffering=1)
         sys.stdout = self.log_handle
         sys.stderr = self.log_handle
         return self
@@ -31,48 +58,223 @@ class OutputCapture:
 def log_with_timestamp(message):
     """Print message with timestamp"""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {message}")
+    # One write per line, so lines logged by concurrent file sets do not get mixed up
+    print(f"[{timestamp}] {message}\n", end="")
+
+def log_file_descriptor():
+    """File descriptor of sys.stdout if it is redirected to a file rather than a terminal, else None"""
+    try:
+        if not sys.stdout.isatty():
+            return sys.stdout.fileno()
+    except (AttributeError, OSError, ValueError):
+        # No real file behind sys.stdout (e.g. io.StringIO)
+        pass
+    return None
 
 def run_subprocess_with_capture(cmd, description=""):
     """Run subprocess and capture ALL its output to the log file"""
     log_with_timestamp(f"Starting: {description}")
-    log_with_timestamp(f"Command: {' '.join(cmd)}")
     
     try:
-        # Run subprocess and capture both stdout and stderr
-        result = sp.run(
-            cmd, 
-            stdout=sp.PIPE, 
-            stderr=sp.STDOUT,  # Redirect stderr to stdout
-            text=True,
-            check=False  # Don't raise exception on non-zero return code
-        )
+        log_fd = log_file_descriptor()
         
-        # Log the output
-        if result.stdout:
+        if log_fd is not None:
+            # Output goes to a log file: let the child write to it directly instead of copying
+            # every byte through this process
             log_with_timestamp("Command output:")
-            print(result.stdout)
+            sys.stdout.flush()
+            returncode = sp.run(
+                cmd, 
+                stdin=sp.DEVNULL,  # Children never read input; don't hand them the terminal
+                stdout=log_fd, 
+                stderr=sp.STDOUT,  # Redirect stderr to stdout
+                check=False
+            ).returncode
+        else:
+            # Run subprocess and stream both stdout and stderr line by line,
+            # instead of holding all of its output in memory until it exits
+            with sp.Popen(
+                cmd, 
+                stdin=sp.DEVNULL,
+                stdout=sp.PIPE, 
+                stderr=sp.STDOUT,
+                text=True,
+                bufsize=1
+            ) as process:
+                # Log the output
+                has_output = False
+                for line in process.stdout:
+                    if not has_output:
+                        log_with_timestamp("Command output:")
+                        has_output = True
+                    sys.stdout.write(line)
+                
+                returncode = process.wait()
+            
+            if has_output:
+                print()
         
-        log_with_timestamp(f"Command completed with return code: {result.returncode}")
+        log_with_timestamp(f"Command completed with return code: {returncode}")
         
-        if result.returncode != 0:
-            log_with_timestamp(f"WARNING: Command failed with return code {result.returncode}")
+        if returncode != 0:
+            log_with_timestamp(f"WARNING: Command failed with return code {returncode}")
+            # The full command is only needed to reproduce a failure
+            log_with_timestamp(f"Command: {shlex.join(cmd)}")
         
-        return result.returncode
+        return returncode
         
     except Exception as e:
         log_with_timestamp(f"ERROR running command: {str(e)}")
+        log_with_timestamp(f"Command: {shlex.join(cmd)}")
         return -1
 
-def main():
+def run_in_process(func, args, description="", kwargs=None):
+    """Run a Python pipeline step in this process, logging it like run_subprocess_with_capture"""
+    log_with_timestamp(f"Starting: {description}")
+    
+    try:
+        func(*args, **(kwargs or {}))
+        returncode = 0
+    except SystemExit as e:
+        # The steps are command line scripts that report failure with sys.exit
+        returncode = e.code if isinstance(e.code, int) else int(e.code is not None)
+    except Exception as e:
+        log_with_timestamp(f"ERROR running {func.__module__}: {str(e)}")
+        return -1
+    
+    log_with_timestamp(f"Command completed with return code: {returncode}")
+    
+    if returncode != 0:
+        log_with_timestamp(f"WARNING: Command failed with return code {returncode}")
+    
+    return returncode
+
+def process_one(file_data, root_dir, root_path, citygml_root, step_workers=1, obj_crs=None):
+    """
+    Run the whole conversion pipeline for one file set.
+    
+    Args:
+        file_data (list): OBJ file, coordinate txt file and building outline GeoJSON of the set
+        root_dir (str): Root directory of the file sets
+        root_path (Path): root_dir as a Path
+        citygml_root (str): Existing output directory of the merged CityGML files
+        step_workers (int): Number of worker processes each pipeline step may use
+        obj_crs (str): CRS of the translated OBJ coordinates for the attribute step (default: boundary CRS)
+    
+    Returns:
+        str: Name of the processed folder
+    """
+    obj = file_data[0]
+    coord = read_and_convert_txt(file_data[1])
+    bo = file_data[2]
+
+    obj_path = Path(obj)
+
+    rel_path = obj_path.relative_to(root_path)
+    folder_name = rel_path.parts[0]
+    
+    log_with_timestamp(f"Processing folder: {folder_name}")
+    log_with_timestamp(f"OBJ file: {obj}")
+    log_with_timestamp(f"Coordinates: {coord}")
+    log_with_timestamp(f"BO file: {bo}")
+
+    output_path = f"{citygml_root}/{folder_name}.gml"
+    log_with_timestamp(f"Output path: {output_path}")
+
+    # Step 1: Pemisahan Bangunan
+    log_with_timestamp("STEP 1/6: Building separation")
+    run_subprocess_with_capture([
+        go_binary("objseparator"), 
+        f"-cx={coord[0]}", f"-cy={coord[1]}",
+        f"{obj}", 
+        f"{bo}",
+        f"{root_dir}/{folder_name}/obj"
+    ], "Building separation")
+
+    # Step 2: Translasi Objek Menuju Koordinat UTM
+    log_with_timestamp("STEP 2/6: Object translation")
+    run_subprocess_with_capture([
+        go_binary("translate"), 
+        f"-input={root_dir}/{folder_name}/obj", 
+        f"-output={root_dir}/{folder_name}/translated", 
+        f"-tx={coord[0]}", 
+        f"-ty={coord[1]}",
+        "-tz=0"
+    ], "Object translation to UTM coordinates")
+
+    # Step 3: Generate MTL
+    log_with_timestamp("STEP 3/6: MTL generation")
+    # Called in-process rather than as `python semantic_mapping.py`, saving an interpreter start per set
+    run_in_process(semantic_mapping_main, [
+        f"{root_dir}/{folder_name}/translated",
+        f"{bo}"
+    ], "MTL generation", {"workers": step_workers})
+
+    # Step 4: Generate attribute
+    log_with_timestamp("STEP 4/5: Generate Attribute")
+    attribute_cmd = [
+        "python", "attribute_gen.py",
+        "--geojson", "Kelurahan DKI.geojson",
+        "--obj_dir", f"{root_dir}/{folder_name}/translated",
+        "--output", f"{root_dir}/{folder_name}/translated",
+        "--workers", str(step_workers)
+    ]
+    if obj_crs:
+        attribute_cmd += ["--obj_crs", obj_crs]
+    run_subprocess_with_capture(attribute_cmd)
+
+    # Move this set's CSV only; other sets may still be writing theirs
+    copy_and_rename_csv_advanced(root_dir, folder_names=[folder_name])
+
+    # Step 5: Convert OBJ ke CityGML lod2
+    log_with_timestamp("STEP 5/6: OBJ to CityGML conversion")
+    run_subprocess_with_capture([
+        go_binary("obj2lod2gml"),
+        "-input", f"{root_dir}/{folder_name}/translated",
+        "-output", f"{root_dir}/{folder_name}/citygml"
+    ], "OBJ to CityGML LOD2 conversion")
+
+    # Step 6: Merge keseluruhan CityGMl lod2 file menjadi 1 file
+    log_with_timestamp("STEP 6/6: CityGML file merging")
+    run_in_process(lod2merge_main, [
+        f"{root_dir}/{folder_name}/citygml",
+        f"{output_path}",
+        f"{folder_name}"
+    ], "CityGML file merging", {"workers": step_workers})
+
+    # Final cleanup
+    log_with_timestamp("Final cleanup")
+    directories_to_delete = [
+        f"{root_dir}/{folder_name}/obj",
+        f"{root_dir}/{folder_name}/translated",
+        f"{root_dir}/{folder_name}/citygml"
+    ]
+    log_with_timestamp(f"Deleting directories: {directories_to_delete}")
+    delete_directories(directories_to_delete)
+    
+    log_with_timestamp(f"✅ Completed processing {folder_name}")
+    
+    return folder_name
+
+def main(root_dir="test", max_workers=None, obj_crs=None):
+    """
+    Convert every complete file set under root_dir to CityGML.
+    
+    Args:
+        root_dir (str): Folder with the exported file sets, one subfolder per set
+        max_workers (int): Number of file sets processed at once (default: number of CPUs)
+        obj_crs (str): CRS of the translated OBJ coordinates, e.g. EPSG:32748 (default: boundary CRS)
+    """
     start = time.time()
 
     print(f"\n⚙️  Program is running... Please wait 😬🙏")
     
-    root_dir = "test"
+    # Paths shared by all file sets, resolved once
+    root_path = Path(root_dir)
+    citygml_root = root_dir.replace('OBJ', 'CityGML')
     
     # Set up log file path
-    log_path = f'{root_dir}/detailed_processing.log'.replace('OBJ', 'CityGML')
+    log_path = f'{citygml_root}/detailed_processing.log'
     
     # Get file set first (before capturing output)
     file_set = find_complete_sets(root_dir)
@@ -88,105 +290,32 @@ def main():
         log_with_timestamp(f"Log file: {log_path}")
         log_with_timestamp(f"Found {len(file_set)} file sets to process")
         
-        for i, file_data in enumerate(file_set):
-            log_with_timestamp(f"--- Processing file set {i+1}/{len(file_set)} ---")
-            
-            obj = file_data[0]
-            coord = read_and_convert_txt(file_data[1])
-            bo = file_data[2]
-
-            root_path = Path(root_dir)
-            obj_path = Path(obj)
-
-            rel_path = obj_path.relative_to(root_path)
-            folder_name = rel_path.parts[0]
-            
-            log_with_timestamp(f"Processing folder: {folder_name}")
-            log_with_timestamp(f"OBJ file: {obj}")
-            log_with_timestamp(f"Coordinates: {coord}")
-            log_with_timestamp(f"BO file: {bo}")
-
-            output_path = f"{root_dir}/{folder_name}.gml".replace('OBJ', 'CityGML')
-            os.makedirs(f"{root_dir}".replace('OBJ', 'CityGML'), exist_ok=True)
-            log_with_timestamp(f"Output path: {output_path}")
-
-            # Update progress bar description (this shows in terminal)
-            pbar.set_description(f"Processing {folder_name}")
-
-            # Step 1: Pemisahan Bangunan
-            log_with_timestamp("STEP 1/6: Building separation")
-            run_subprocess_with_capture([
-                "go", "run", "objseparator.go", 
-                f"-cx={coord[0]}", f"-cy={coord[1]}",
-                f"{obj}", 
-                f"{bo}",
-                f"{root_dir}/{folder_name}/obj"
-            ], "Building separation")
-
-            # Step 2: Translasi Objek Menuju Koordinat UTM
-            log_with_timestamp("STEP 2/6: Object translation")
-            run_subprocess_with_capture([
-                "go", "run", "translate.go", 
-                f"-input={root_dir}/{folder_name}/obj", 
-                f"-output={root_dir}/{folder_name}/translated", 
-                f"-tx={coord[0]}", 
-                f"-ty={coord[1]}",
-                "-tz=0"
-            ], "Object translation to UTM coordinates")
-
-            # Step 3: Generate MTL
-            log_with_timestamp("STEP 3/6: MTL generation")
-            run_subprocess_with_capture([
-                "python", "semantic_mapping.py",
-                "--obj-dir", f"{root_dir}/{folder_name}/translated",
-                "--geojson", f"{bo}"
-            ], "MTL generation")
-
-            # Step 4: Generate attribute
-            log_with_timestamp("STEP 4/5: Generate Attribute")
-            run_subprocess_with_capture([
-                "python", "attribute_gen.py",
-                "--geojson", "Kelurahan DKI.geojson",
-                "--obj_dir", f"{root_dir}/{folder_name}/translated",
-                "--output", f"{root_dir}/{folder_name}/translated"
-            ])
-
-            run_subprocess_with_capture([
-                "python", "copyNrename.py", "--root_dir", root_dir
-            ])
-
-            # Step 5: Convert OBJ ke CityGML lod2
-            log_with_timestamp("STEP 5/6: OBJ to CityGML conversion")
-            run_subprocess_with_capture([
-                "go", "run", "obj2lod2gml.go",
-                "-input", f"{root_dir}/{folder_name}/translated",
-                "-output", f"{root_dir}/{folder_name}/citygml"
-            ], "OBJ to CityGML LOD2 conversion")
-
-            # Step 6: Merge keseluruhan CityGMl lod2 file menjadi 1 file
-            log_with_timestamp("STEP 6/6: CityGML file merging")
-            run_subprocess_with_capture([
-                "python", "lod2merge.py",
-                f"{root_dir}/{folder_name}/citygml",
-                f"{output_path}",
-                "--name", f"{folder_name}"
-            ], "CityGML file merging")
-
-            # Final cleanup
-            log_with_timestamp("Final cleanup")
-            directories_to_delete = [
-                f"{root_dir}/{folder_name}/obj",
-                f"{root_dir}/{folder_name}/translated",
-                f"{root_dir}/{folder_name}/citygml"
-            ]
-            log_with_timestamp(f"Deleting directories: {directories_to_delete}")
-            delete_directories(directories_to_delete)
-            
-            log_with_timestamp(f"✅ Completed processing {folder_name}")
-            
-            # Update progress bar (this shows in terminal)
-            pbar.update(1)
-            pbar.set_description(f"✅ Completed all processing")
+        build_go_binaries()
+        
+        # File sets are independent (own inputs, outputs and work folders), so they are processed in parallel.
+        # The work happens in the Go/Python child processes, so threads that drive them are enough
+        workers = max(1, min(len(file_set), max_workers or os.cpu_count() or 1))
+        
+        # The steps of a set start process pools of their own; share the CPUs between the sets
+        # instead of letting every set use all of them
+        step_workers = max(1, (os.cpu_count() or 1) // workers)
+        
+        # Largest OBJ files first, so a big set does not start last and keep one worker busy at the end
+        file_set.sort(key=lambda file_data: os.stat(file_data[0]).st_size, reverse=True)
+        
+        # Output directory of the merged CityGML files, shared by all file sets
+        os.makedirs(citygml_root, exist_ok=True)
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(process_one, file_data, root_dir, root_path, citygml_root, step_workers, obj_crs) for file_data in file_set]
+            for future in as_completed(futures):
+                folder_name = future.result()
+                
+                # Update progress bar (this shows in terminal)
+                pbar.update(1)
+                pbar.set_description(f"✅ Completed {folder_name}")
+        
+        pbar.set_description(f"✅ Completed all processing")
 
         end = time.time() - start
         log_with_timestamp("=== PROCESSING COMPLETED ===")
@@ -203,5 +332,32 @@ def main():
     print(f"📝 Detailed logs with timestamps saved to '{log_path}'")
     print("\n© 2025. Fairuz Akmal Pradana 👱")
 
+def parse_args():
+    """Parse the command line arguments of the pipeline"""
+    parser = argparse.ArgumentParser(description='Convert exported OBJ file sets to CityGML')
+    
+    parser.add_argument(
+        '--root_dir',
+        default='test',
+        help='Folder with the exported file sets, one subfolder per set (default: test)'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of file sets processed at once (default: number of CPUs)'
+    )
+    
+    parser.add_argument(
+        '--obj_crs',
+        default=None,
+        help='CRS of the translated OBJ coordinates, e.g. EPSG:32748; administrative boundaries are '
+             'reprojected to it for the attribute step (default: use the boundary CRS)'
+    )
+    
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(args.root_dir, args.workers, args.obj_crs)
@@ -6,15 +6,23 @@ Features: Advanced ground detection, robust classification, and validation syste
 """
 
 import os
+import io
+import re
 import json
+import math
 import numpy as np
 import argparse
 from pathlib import Path
+import multiprocessing as mp
+import shapely
 import shapely.geometry as geometry
 from shapely.geometry import Polygon
 from datetime import datetime
 from scipy import stats
-from collections import defaultdict
+from scipy.spatial import cKDTree
+from itertools import chain
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
 
 __version__ = "2.0.0"
 
@@ -25,6 +33,46 @@ COLORS = {
     'Ground': (0.82, 0.41, 0.12, 1.0)  # Chocolate
 }
 
+# Material library written next to every processed OBJ file
+MTL_TEMPLATE = f"# Generated by Building Colorizer v{__version__}\n\n" + ''.join(
+    f"newmtl {mat_name}\n"
+    f"Ka 0.000 0.000 0.000\n"
+    f"Kd {color[0]:.6f} {color[1]:.6f} {color[2]:.6f}\n"
+    f"Ks 0.000 0.000 0.000\n"
+    f"d {color[3]:.6f}\n"
+    "illum 1\n\n"
+    for mat_name, color in COLORS.items())
+
+# Face classes, kept as small integer codes in the classification arrays
+GROUND, WALL, ROOF = 0, 1, 2
+FACE_CLASSES = ['Ground', 'Wall', 'Roof']
+
+# usemtl line for every face class
+USEMTL_LINES = [f"usemtl {name}\n".encode() for name in FACE_CLASSES]
+
+# Faces whose centroids lie within this distance (in meters) are neighbors
+NEIGHBOR_RADIUS = 0.5
+
+# OBJ lines starting with a 'v' or 'f' token in a form the bulk parser does not handle; matched from the
+# preceding newline, which lets the regex engine scan for the literal '\n' instead of trying every position
+IRREGULAR_OBJ_LINE = re.compile(r'\n(?:[ \t\f\v\r]+[vf](?:[ \t\f\v\r\n]|$)|[vf](?:[\t\f\v\r\n]|$| [ \t\f\v\r]*(?:\n|$)))')
+
+# Everything after the vertex index in a face reference (v/vt, v//vn, v/vt/vn)
+FACE_REFERENCE_SUFFIX = re.compile(r'/\S*')
+
+# Anything but digits, signs and whitespace
+NON_INTEGER_TEXT = re.compile(r'[^0-9+\-\s]')
+
+# Start workers from a clean server process instead of forking the caller, which is unsafe
+# when the colorizer runs inside a multithreaded program such as main.py
+MP_CONTEXT = mp.get_context('forkserver') if 'forkserver' in mp.get_all_start_methods() else None
+
+def _cross3(a, b):
+    """Cross product of (..., 3) arrays, written out instead of going through np.cross"""
+    return np.stack([a[..., 1] * b[..., 2] - a[..., 2] * b[..., 1],
+                     a[..., 2] * b[..., 0] - a[..., 0] * b[..., 2],
+                     a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]], axis=-1)
+
 class MeshAnalyzer:
     """Handles mesh analysis and validation"""
     
@@ -34,25 +82,47 @@ class MeshAnalyzer:
         Analyze Z-coordinate distribution to find ground level
         Uses histogram analysis to identify the most significant low-level plane
         """
-        if not z_values:
+        z_values = np.asarray(z_values, dtype=np.float64)
+        if z_values.size == 0:
             return 0.0
             
         # Create histogram of Z values
-        hist, bin_edges = np.histogram(z_values, bins=50)
+        hist, bin_edges = MeshAnalyzer.histogram_uniform(z_values, bins=50)
         
         # Find the lowest significant peak
-        significant_threshold = max(hist) * 0.1
-        for i, count in enumerate(hist):
-            if count > significant_threshold:
-                return bin_edges[i]
+        significant = np.flatnonzero(hist > hist.max() * 0.1)
+        if significant.size:
+            return bin_edges[significant[0]]
+        
+        return z_values.min()
+
+    @staticmethod
+    def histogram_uniform(values, bins=50):
+        """
+        Histogram of values over equal-width bins spanning their range, same as np.histogram(values, bins)
+        Scales the values to bin indices and counts them with np.bincount, skipping np.histogram's
+        general-purpose argument handling
+        Returns: tuple (hist, bin_edges)
+        """
+        first_edge, last_edge = values.min(), values.max()
+        if not (np.isfinite(first_edge) and np.isfinite(last_edge)):
+            raise ValueError(f"autodetected range of [{first_edge}, {last_edge}] is not finite")
+        if first_edge == last_edge:
+            first_edge, last_edge = first_edge - 0.5, last_edge + 0.5
+        bin_edges = np.linspace(first_edge, last_edge, bins + 1)
+        
+        indices = ((values - first_edge) / (last_edge - first_edge) * bins).astype(np.intp)
+        indices[indices == bins] -= 1
+        # Scaling can be off by one bin within ~1 ULP of an edge; the last bin includes its right edge
+        indices[values < bin_edges[indices]] -= 1
+        indices[(values >= bin_edges[indices + 1]) & (indices != bins - 1)] += 1
         
-        return min(z_values)
+        return np.bincount(indices, minlength=bins), bin_edges
 
     @staticmethod
     def get_face_centroid(vertices, face):
         """Calculate the centroid of a face"""
-        face_vertices = [vertices[idx] for idx in face]
-        return np.mean(face_vertices, axis=0)
+        return vertices[np.asarray(face)].mean(axis=0)
 
     @staticmethod
     def get_face_area(vertices, face):
@@ -64,35 +134,80 @@ class MeshAnalyzer:
         area = 0.0
         
         for i in range(1, len(face)-1):
-            v1 = vertices[face[i]]
-            v2 = vertices[face[i+1]]
+            ax, ay, az = vertices[face[i]] - v0
+            bx, by, bz = vertices[face[i+1]] - v0
             # Calculate area of triangle
-            cross_product = np.cross(v1 - v0, v2 - v0)
-            area += np.linalg.norm(cross_product) / 2
+            cx, cy, cz = ay*bz - az*by, az*bx - ax*bz, ax*by - ay*bx
+            area += math.sqrt(cx*cx + cy*cy + cz*cz) / 2
             
         return area
 
+    @staticmethod
+    def triangulate_faces(face_indices, face_sizes):
+        """
+        Fan triangulation (v0, vi, vi+1) of every face, as get_face_area
+        Takes the faces packed as by load_obj_file; the triangles of a face are consecutive
+        Returns: array (T,3) of vertex indices
+        """
+        starts = np.zeros(len(face_sizes), dtype=np.intp)
+        np.cumsum(face_sizes[:-1], out=starts[1:])
+        
+        triangle_counts = face_sizes - 2
+        triangle_face = np.repeat(np.arange(len(face_sizes)), triangle_counts)
+        first_triangles = np.cumsum(triangle_counts) - triangle_counts
+        fan = starts[triangle_face]
+        second = fan + 1 + np.arange(len(triangle_face)) - first_triangles[triangle_face]
+        return np.stack((face_indices[fan], face_indices[second], face_indices[second + 1]), axis=1)
+
+    @staticmethod
+    def compute_face_geometry(vertices, face_indices, face_sizes, triangles):
+        """
+        Calculate normal, centroid and area of every face in one vectorized pass
+        Takes the faces packed and triangulated as by load_obj_file
+        Returns: tuple (normals (F,3), centroids (F,3), areas (F,))
+        """
+        # Face i is face_indices[starts[i]:starts[i] + sizes[i]]
+        sizes = face_sizes
+        starts = np.zeros(len(sizes), dtype=np.intp)
+        np.cumsum(sizes[:-1], out=starts[1:])
+        
+        centroids = np.add.reduceat(vertices[face_indices], starts, axis=0) / sizes[:, None]
+        
+        # Face i is split into triangles[first_triangles[i]:first_triangles[i] + sizes[i] - 2]
+        triangle_counts = sizes - 2
+        first_triangles = np.cumsum(triangle_counts) - triangle_counts
+        triangle_vertices = vertices[triangles]
+        a = triangle_vertices[:, 0]
+        cross_products = _cross3(triangle_vertices[:, 1] - a, triangle_vertices[:, 2] - a)
+        cross_lengths = np.sqrt((cross_products * cross_products).sum(axis=1))
+        
+        # Normal of the first triangle (the first three vertices), (0, 0, 1) for degenerate faces (as get_face_normal)
+        normals = cross_products[first_triangles]
+        lengths = cross_lengths[first_triangles]
+        degenerate = lengths == 0
+        normals[degenerate] = (0, 0, 1)
+        lengths[degenerate] = 1
+        normals /= lengths[:, None]
+        
+        areas = np.bincount(np.repeat(np.arange(len(sizes)), triangle_counts),
+                            weights=cross_lengths / 2, minlength=len(sizes))
+        
+        return normals, centroids, areas
+
 class GeometryValidator:
     """Handles geometric validation and consistency checks"""
     
     def __init__(self, tolerance=0.01):
         self.tolerance = tolerance
         
-    def validate_ground_classification(self, vertices, face, ground_height):
+    def validate_ground_classification(self, avg_z, normals, ground_height):
         """
-        Validate if a face should be classified as ground
-        Returns True if the face meets ground criteria
+        Validate if faces should be classified as ground
+        Takes the average Z and the normal of one face, or arrays of them
+        Returns True where a face meets ground criteria
         """
-        face_z_coords = [vertices[idx][2] for idx in face]
-        avg_z = sum(face_z_coords) / len(face_z_coords)
-        
-        # Check if face is at ground level
-        if abs(avg_z - ground_height) > self.tolerance:
-            return False
-            
-        # Check if face is horizontal
-        normal = self.get_face_normal(vertices, face)
-        return abs(normal[2]) > 0.95
+        # Face is at ground level and horizontal
+        return (np.abs(avg_z - ground_height) <= self.tolerance) & (np.abs(normals[..., 2]) > 0.95)
 
     @staticmethod
     def get_face_normal(vertices, face):
@@ -101,80 +216,161 @@ class GeometryValidator:
             return np.array([0, 0, 1])
             
         v0 = vertices[face[0]]
-        v1 = vertices[face[1]]
-        v2 = vertices[face[2]]
+        ax, ay, az = vertices[face[1]] - v0
+        bx, by, bz = vertices[face[2]] - v0
         
-        normal = np.cross(v1 - v0, v2 - v0)
-        if np.all(normal == 0):
+        nx, ny, nz = ay*bz - az*by, az*bx - ax*bz, ax*by - ay*bx
+        length = math.sqrt(nx*nx + ny*ny + nz*nz)
+        if length == 0:
             return np.array([0, 0, 1])
-        return normal / np.linalg.norm(normal)
+        return np.array([nx, ny, nz]) / length
+
+# Colorizer shared by the worker processes, set once per worker by _init_worker
+_worker_colorizer = None
+
+def _init_worker(colorizer):
+    """Process pool initializer: keep one colorizer instance per worker"""
+    global _worker_colorizer
+    _worker_colorizer = colorizer
+
+def _process_building_worker(obj_path):
+    """Process a single building in a worker, returning (printed output, statistics)"""
+    _worker_colorizer.reset_stats()
+    with redirect_stdout(io.StringIO()) as output:
+        _worker_colorizer.process_building(obj_path)
+    return output.getvalue(), _worker_colorizer.stats
 
 class BuildingColorizer:
-    def __init__(self, obj_dir, geojson_path):
+    def __init__(self, obj_dir, geojson_path, context_voting=False):
         self.obj_dir = Path(obj_dir)
         self.geojson_path = Path(geojson_path)
+        self.context_voting = context_voting
         self.building_outlines = self.load_all_building_outlines()
         self.mesh_analyzer = MeshAnalyzer()
         self.geometry_validator = GeometryValidator()
-        self.classification_cache = {}
         
         # Statistics and logging
+        self.reset_stats()
+        self.start_time = datetime.now()
+
+    def reset_stats(self):
+        """
+        Start statistics from zero
+        """
         self.stats = {
             'processed_files': 0,
             'failed_files': [],
             'classification_changes': 0
         }
-        self.start_time = datetime.now()
 
     def load_obj_file(self, obj_path):
         """
         Load vertices and faces from OBJ file
-        Returns: tuple (vertices, faces)
+        Faces are packed into one flat array of vertex indices and the vertex count of each face,
+        and fan triangulated once for the geometry calculations
+        Returns: tuple (vertices, face_indices, face_sizes, triangles)
         """
-        vertices = []
-        faces = []
-        
         try:
             with open(obj_path, 'r') as f:
-                for line in f:
-                    if line.startswith('#'):  # Skip comments
-                        continue
-                        
-                    values = line.split()
-                    if not values:  # Skip empty lines
-                        continue
-                        
-                    if values[0] == 'v':  # Vertex
-                        try:
-                            vertex = [float(values[1]), float(values[2]), float(values[3])]
-                            vertices.append(vertex)
-                        except (IndexError, ValueError) as e:
-                            print(f"Warning: Invalid vertex in {obj_path.name}: {line.strip()}")
-                            continue
-                            
-                    elif values[0] == 'f':  # Face
-                        try:
-                            # Handle different face formats (v, v/vt, v/vt/vn)
-                            face = []
-                            for v in values[1:]:
-                                # Extract just the vertex index (before any '/')
-                                vertex_idx = int(v.split('/')[0]) - 1  # OBJ indices start at 1
-                                face.append(vertex_idx)
-                            if len(face) >= 3:  # Only add faces with 3 or more vertices
-                                faces.append(face)
-                        except (IndexError, ValueError) as e:
-                            print(f"Warning: Invalid face in {obj_path.name}: {line.strip()}")
-                            continue
+                text = f.read()
+                
+            # Bulk parse the common layout; anything else goes through the line parser and its warnings
+            mesh = self.parse_obj_bulk(text)
+            if mesh is None:
+                mesh = self.parse_obj_lines(text.split('\n'), obj_path)
+            vertices, face_indices, face_sizes = mesh
                             
-            if not vertices or not faces:
+            if not len(vertices) or not len(face_sizes):
                 print(f"Warning: No valid vertices or faces found in {obj_path.name}")
-                return None, None
+                return None, None, None, None
                 
-            return np.array(vertices), faces
+            triangles = self.mesh_analyzer.triangulate_faces(face_indices, face_sizes)
+            return vertices, face_indices, face_sizes, triangles
             
         except Exception as e:
             print(f"Error loading {obj_path.name}: {str(e)}")
-            return None, None
+            return None, None, None, None
+
+    @staticmethod
+    def parse_obj_bulk(text):
+        """
+        Parse vertices and faces of OBJ text with whole-file NumPy parsing instead of per-value casts
+        Returns: tuple (vertices, face_indices, face_sizes), or None if the text needs the line parser
+        """
+        if IRREGULAR_OBJ_LINE.search('\n' + text):
+            return None
+            
+        lines = text.split('\n')
+        vertex_lines = [line[2:] for line in lines if line.startswith('v ')]
+        face_lines = [line[2:] for line in lines if line.startswith('f ')]
+        if not vertex_lines or not face_lines:
+            return None
+            
+        # Keep just the vertex index of each face reference; only plain integers are parsed in bulk
+        face_text = FACE_REFERENCE_SUFFIX.sub('', ' '.join(face_lines))
+        face_values = face_text.split()
+        if not face_values or NON_INTEGER_TEXT.search(face_text):
+            return None
+            
+        try:
+            vertices = np.loadtxt(vertex_lines, dtype=np.float64, comments=None, ndmin=2)
+            face_indices = np.loadtxt(face_values, dtype=np.intp, comments=None, ndmin=1) - 1  # OBJ indices start at 1
+        except ValueError:
+            return None
+        face_sizes = np.fromiter(map(len, map(str.split, face_lines)), dtype=np.intp, count=len(face_lines))
+        if vertices.shape != (len(vertex_lines), 3) or face_sizes.sum() != len(face_indices):
+            return None
+            
+        # Only faces with 3 or more vertices
+        valid = face_sizes >= 3
+        if not valid.all():
+            face_indices = face_indices[np.repeat(valid, face_sizes)]
+            face_sizes = face_sizes[valid]
+            
+        return vertices, face_indices, face_sizes
+
+    @staticmethod
+    def parse_obj_lines(lines, obj_path):
+        """
+        Parse vertices and faces of OBJ lines one at a time, skipping invalid lines with a warning
+        Returns: tuple (vertices, face_indices, face_sizes)
+        """
+        vertices = []
+        faces = []
+        
+        for line in lines:
+            if line.startswith('#'):  # Skip comments
+                continue
+                
+            values = line.split()
+            if not values:  # Skip empty lines
+                continue
+                
+            if values[0] == 'v':  # Vertex
+                try:
+                    vertex = [float(values[1]), float(values[2]), float(values[3])]
+                    vertices.append(vertex)
+                except (IndexError, ValueError) as e:
+                    print(f"Warning: Invalid vertex in {obj_path.name}: {line.strip()}")
+                    continue
+                    
+            elif values[0] == 'f':  # Face
+                try:
+                    # Handle different face formats (v, v/vt, v/vt/vn)
+                    face = []
+                    for v in values[1:]:
+                        # Extract just the vertex index (before any '/')
+                        vertex_idx = int(v.split('/')[0]) - 1  # OBJ indices start at 1
+                        face.append(vertex_idx)
+                    if len(face) >= 3:  # Only add faces with 3 or more vertices
+                        faces.append(face)
+                except (IndexError, ValueError) as e:
+                    print(f"Warning: Invalid face in {obj_path.name}: {line.strip()}")
+                    continue
+                    
+        face_sizes = np.fromiter(map(len, faces), dtype=np.intp, count=len(faces))
+        face_indices = np.fromiter(chain.from_iterable(faces), dtype=np.intp, count=face_sizes.sum())
+        return np.array(vertices), face_indices, face_sizes
 
     def load_all_building_outlines(self):
         """Enhanced building outline loader with validation"""
@@ -182,97 +378,100 @@ class BuildingColorizer:
         try:
             with open(self.geojson_path, 'r') as f:
                 data = json.load(f)
+                rings = []
                 for feature in data['features']:
                     if feature['geometry']['type'] in ['MultiPolygon', 'Polygon']:
                         coords = (feature['geometry']['coordinates'][0][0] 
                                 if feature['geometry']['type'] == 'MultiPolygon'
                                 else feature['geometry']['coordinates'][0])
-                        try:
-                            polygon = Polygon(coords)
-                            if polygon.is_valid:
-                                centroid = polygon.centroid
-                                building_outlines[f"{centroid.x}_{centroid.y}"] = polygon
-                        except Exception as e:
-                            print(f"Invalid polygon: {str(e)}")
-                            
+                        rings.append(coords)
+                        
+            # Build all polygons in one call; if shapely rejects any ring, build them one by one instead
+            polygons = self.build_outline_polygons(rings)
+            if polygons is None:
+                polygons = []
+                for coords in rings:
+                    try:
+                        polygons.append(Polygon(coords))
+                    except Exception as e:
+                        print(f"Invalid polygon: {str(e)}")
+                polygons = np.array(polygons, dtype=object)
+                
+            polygons = polygons[shapely.is_valid(polygons) & ~shapely.is_empty(polygons)]
+            centroids = shapely.get_coordinates(shapely.centroid(polygons))
+            for polygon, (x, y) in zip(polygons, centroids.tolist()):
+                building_outlines[f"{x}_{y}"] = polygon
+                
             print(f"Loaded {len(building_outlines)} valid building outlines")
             return building_outlines
         except Exception as e:
             print(f"Error loading GeoJSON: {str(e)}")
             return {}
 
-    def process_mesh(self, vertices, faces):
+    @staticmethod
+    def build_outline_polygons(rings):
+        """
+        Build outline polygons for all rings at once with the shapely array API
+        Returns: array of polygons, or None if any ring cannot be built
+        """
+        if not rings:
+            return np.empty(0, dtype=object)
+        try:
+            coords = np.concatenate([np.asarray(ring, dtype=float) for ring in rings])
+            ring_ids = np.repeat(np.arange(len(rings)), [len(ring) for ring in rings])
+            return shapely.polygons(shapely.linearrings(coords, indices=ring_ids))
+        except Exception:
+            return None
+
+    def process_mesh(self, vertices, face_indices, face_sizes, triangles):
         """
         Process mesh data with enhanced analysis
         """
         # Find ground level using distribution analysis
-        z_values = [v[2] for v in vertices]
+        z_values = vertices[:, 2]
         ground_height = self.mesh_analyzer.analyze_z_distribution(z_values)
         
-        # Create spatial index for faces
-        face_index = self.create_spatial_index(vertices, faces)
+        # Face properties for the whole mesh at once
+        normals, centroids, areas = self.mesh_analyzer.compute_face_geometry(vertices, face_indices, face_sizes, triangles)
         
-        # Process each face with context awareness
-        classifications = []
-        for face_idx, face in enumerate(faces):
-            # Get neighboring faces
-            neighbors = self.get_neighboring_faces(face_idx, face_index)
-            
-            # Classify face with context
-            face_type = self.classify_face_with_context(
-                vertices, face, ground_height, neighbors)
-            
-            classifications.append(face_type)
-            
-        return classifications, ground_height
-
-    def classify_face_with_context(self, vertices, face, ground_height, neighbors):
-        """
-        Classify face considering neighboring geometry
-        """
-        # Get face properties
-        normal = self.geometry_validator.get_face_normal(vertices, face)
-        centroid = self.mesh_analyzer.get_face_centroid(vertices, face)
+        # Basic classification of all faces at once
+        classifications = self.classify_faces(normals, centroids[:, 2], ground_height)
         
-        # Basic classification
-        if self.geometry_validator.validate_ground_classification(vertices, face, ground_height):
-            base_class = 'Ground'
-        elif abs(normal[2]) < 0.1:  # Nearly vertical
-            base_class = 'Wall'
-        else:
-            base_class = 'Roof'
-            
-        # Consider neighbor consistency
-        if neighbors:
-            neighbor_classes = [self.classification_cache.get(n, base_class) for n in neighbors]
-            most_common = max(set(neighbor_classes), key=neighbor_classes.count)
+        # Consider neighbor consistency (off by default: the original neighbor lookup never
+        # returned any faces, so enabling it changes the labels of existing outputs)
+        if self.context_voting:
+            face_index = cKDTree(centroids)
+            neighbor_pairs = face_index.query_pairs(NEIGHBOR_RADIUS, output_type='ndarray')
+            classifications = self.classify_faces_with_context(classifications, neighbor_pairs)
             
-            # Only override if significantly different
-            if most_common != base_class and neighbor_classes.count(most_common) > len(neighbors) * 0.7:
-                self.stats['classification_changes'] += 1
-                return most_common
-                
-        return base_class
+        return classifications, ground_height
 
-    def create_spatial_index(self, vertices, faces):
+    def classify_faces(self, normals, avg_z, ground_height):
         """
-        Create spatial index for efficient neighbor queries
+        Classify faces as ground, wall or roof from their normals and average Z
+        Returns: array of face class codes
         """
-        face_index = defaultdict(list)
-        for i, face in enumerate(faces):
-            centroid = self.mesh_analyzer.get_face_centroid(vertices, face)
-            # Create grid cell key
-            cell_key = tuple(np.floor(centroid / 0.5).astype(int))
-            face_index[cell_key].append(i)
-        return face_index
+        is_ground = self.geometry_validator.validate_ground_classification(avg_z, normals, ground_height)
+        is_wall = np.abs(normals[:, 2]) < 0.1  # Nearly vertical
+        return np.where(is_ground, GROUND, np.where(is_wall, WALL, ROOF)).astype(np.int8)
 
-    def get_neighboring_faces(self, face_idx, face_index):
+    def classify_faces_with_context(self, base_classes, neighbor_pairs):
         """
-        Find neighboring faces using spatial index
+        Classify faces considering the classes of their neighboring faces
+        Returns: array of face class codes
         """
-        # Implementation depends on spatial index structure
-        # This is a simplified version
-        return []  # TODO: Implement proper neighbor finding
+        # Neighbor count of every face per class, both ways round for each pair
+        faces = np.concatenate((neighbor_pairs[:, 0], neighbor_pairs[:, 1]))
+        neighbors = np.concatenate((neighbor_pairs[:, 1], neighbor_pairs[:, 0]))
+        class_count = len(FACE_CLASSES)
+        counts = np.bincount(faces * class_count + base_classes[neighbors],
+                             minlength=len(base_classes) * class_count).reshape(-1, class_count)
+        most_common = counts.argmax(axis=1)
+        
+        # Only override if significantly different
+        override = (most_common != base_classes) & (counts.max(axis=1) > counts.sum(axis=1) * 0.7)
+        self.stats['classification_changes'] += int(np.count_nonzero(override))
+        return np.where(override, most_common, base_classes).astype(np.int8)
 
     def create_materials(self, obj_path, classifications):
         """
@@ -281,17 +480,7 @@ class BuildingColorizer:
         mtl_path = obj_path.with_suffix('.mtl')
         
         try:
-            with open(mtl_path, 'w') as f:
-                f.write("# Generated by Building Colorizer v2.0.0\n\n")
-                
-                for mat_name, color in COLORS.items():
-                    f.write(f"newmtl {mat_name}\n")
-                    f.write(f"Ka 0.000 0.000 0.000\n")
-                    f.write(f"Kd {color[0]:.6f} {color[1]:.6f} {color[2]:.6f}\n")
-                    f.write(f"Ks 0.000 0.000 0.000\n")
-                    f.write(f"d {color[3]:.6f}\n")
-                    f.write("illum 1\n\n")
-                    
+            mtl_path.write_text(MTL_TEMPLATE)
         except Exception as e:
             self.stats['failed_files'].append((obj_path.name, f"Material creation failed: {str(e)}"))
 
@@ -302,24 +491,49 @@ class BuildingColorizer:
         temp_path = obj_path.with_suffix('.tmp')
         
         try:
-            with open(obj_path, 'r') as src, open(temp_path, 'w') as dst:
-                # Write header
-                dst.write(f"# Processed by Building Colorizer v{__version__}\n")
-                dst.write(f"mtllib {obj_path.stem}.mtl\n")
-                
-                face_idx = 0
-                current_material = None
+            # Newlines are normalized the same way as reading the file in text mode
+            data = obj_path.read_bytes().replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+            source = memoryview(data)
+            
+            # Byte range of every line
+            chars = np.frombuffer(data, dtype=np.uint8)
+            line_ends = np.flatnonzero(chars == ord('\n')) + 1
+            if data and not data.endswith(b'\n'):
+                line_ends = np.append(line_ends, len(data))
+            line_starts = np.concatenate(([0], line_ends[:-1]))
+            
+            # First six bytes of every line (zero padded at the end of the file)
+            heads = np.concatenate((chars, np.zeros(6, dtype=np.uint8)))[line_starts[:, None] + np.arange(6)]
+            is_face = (heads[:, 0] == ord('f')) & (heads[:, 1] == ord(' '))
+            is_material = ((heads == np.frombuffer(b'mtllib', dtype=np.uint8)).all(axis=1) |
+                           (heads == np.frombuffer(b'usemtl', dtype=np.uint8)).all(axis=1))
+            
+            face_lines = np.flatnonzero(is_face)
+            if len(face_lines) > len(classifications):
+                raise IndexError("list index out of range")
                 
-                for line in src:
-                    if line.startswith('f '):
-                        new_material = classifications[face_idx]
-                        if new_material != current_material:
-                            dst.write(f"usemtl {new_material}\n")
-                            current_material = new_material
-                        dst.write(line)
-                        face_idx += 1
-                    elif not line.startswith(('mtllib', 'usemtl')):
-                        dst.write(line)
+            # A usemtl line goes before every face whose material differs from the previous face
+            codes = classifications[:len(face_lines)]
+            changes = np.flatnonzero(np.diff(codes)) + 1
+            if len(codes):
+                changes = np.concatenate(([0], changes))
+            events = sorted(list(zip(face_lines[changes].tolist(), codes[changes].tolist())) +
+                            [(line, None) for line in np.flatnonzero(is_material).tolist()])
+            
+            # Copy the source between events, leaving out old material lines
+            pieces = [f"# Processed by Building Colorizer v{__version__}\nmtllib {obj_path.stem}.mtl\n".encode()]
+            position = 0
+            for line, code in events:
+                pieces.append(source[position:line_starts[line]])
+                if code is None:
+                    position = line_ends[line]
+                else:
+                    pieces.append(USEMTL_LINES[code])
+                    position = line_starts[line]
+            pieces.append(source[position:])
+            
+            with open(temp_path, 'wb') as dst:
+                dst.write(b''.join(pieces))
                         
             # Replace original file
             os.replace(temp_path, obj_path)
@@ -338,16 +552,16 @@ class BuildingColorizer:
         try:
             # Load mesh data
             print(f"  Loading mesh data...")
-            vertices, faces = self.load_obj_file(obj_path)
-            if vertices is None or faces is None:
+            vertices, face_indices, face_sizes, triangles = self.load_obj_file(obj_path)
+            if vertices is None:
                 print(f"  Failed to load mesh data for {obj_path.name}")
                 return
                 
-            print(f"  Loaded {len(vertices)} vertices and {len(faces)} faces")
+            print(f"  Loaded {len(vertices)} vertices and {len(face_sizes)} faces")
             
             # Process mesh
             print(f"  Processing mesh...")
-            classifications, ground_height = self.process_mesh(vertices, faces)
+            classifications, ground_height = self.process_mesh(vertices, face_indices, face_sizes, triangles)
             print(f"  Ground height detected: {ground_height:.2f}")
             
             # Create materials and update OBJ
@@ -365,12 +579,26 @@ class BuildingColorizer:
             print(f"  Error: {error_msg}")
             self.stats['failed_files'].append((obj_path.name, error_msg))
 
-    def process_all_buildings(self):
+    def process_all_buildings(self, max_workers=None):
         """
         Process all buildings in directory
         """
-        for obj_path in self.obj_dir.glob('*.obj'):
-            self.process_building(obj_path)
+        obj_paths = list(self.obj_dir.glob('*.obj'))
+        workers = min(max_workers or os.cpu_count() or 1, len(obj_paths))
+        
+        if workers > 1:
+            # Buildings are independent, so they are processed in parallel; map keeps the file order
+            chunksize = max(1, len(obj_paths) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, mp_context=MP_CONTEXT,
+                                     initializer=_init_worker, initargs=(self,)) as executor:
+                for output, stats in executor.map(_process_building_worker, obj_paths, chunksize=chunksize):
+                    print(output, end='')
+                    self.stats['processed_files'] += stats['processed_files']
+                    self.stats['failed_files'] += stats['failed_files']
+                    self.stats['classification_changes'] += stats['classification_changes']
+        else:
+            for obj_path in obj_paths:
+                self.process_building(obj_path)
         self.print_summary()
 
     def print_summary(self):
@@ -392,16 +620,31 @@ class BuildingColorizer:
                 print(f"- {name}: {error}")
         print("=====================================")
 
-def main():
+def main(obj_dir, geojson_path, workers=None, context_voting=False):
+    """
+    Assign Roof/Wall/Ground materials to every OBJ file of a directory.
+    
+    Args:
+        obj_dir (str): Directory containing OBJ files
+        geojson_path (str): Path to GeoJSON building outlines
+        workers (int): Number of worker processes (default: number of CPUs)
+        context_voting (bool): Relabel faces whose neighbors mostly belong to another class
+    """
+    colorizer = BuildingColorizer(obj_dir, geojson_path, context_voting)
+    colorizer.process_all_buildings(workers)
+
+def parse_args():
+    """Parse the command line arguments of the colorizer"""
     parser = argparse.ArgumentParser(description='Building Colorizer v2.0.0')
     parser.add_argument('--obj-dir', required=True, help='Directory containing OBJ files')
     parser.add_argument('--geojson', required=True, help='Path to GeoJSON building outlines')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: number of CPUs)')
+    parser.add_argument('--context-voting', action='store_true',
+                        help=f'Relabel faces whose neighbors within {NEIGHBOR_RADIUS} m mostly belong to another class')
     parser.add_argument('--debug', action='store_true', help='Enable debug output')
     
-    args = parser.parse_args()
-    
-    colorizer = BuildingColorizer(args.obj_dir, args.geojson)
-    colorizer.process_all_buildings()
+    return parser.parse_args()
 
 if __name__ == '__main__':
-    main()
+    args = parse_args()
+    main(args.obj_dir, args.geojson, args.workers, args.context_voting)
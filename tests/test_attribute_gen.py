@@ -0,0 +1,137 @@
+import csv
+import json
+
+import pytest
+from pyproj import Transformer
+
+from attribute_gen import OBJToCSVGenerator
+
+# Two adjacent 100 m kelurahan squares in UTM 48S meters (EPSG:32748)
+X0, Y0 = 700000.0, 9300000.0
+BOUNDARIES = [
+    ("Kelurahan A", "Kecamatan A", "Kota A", (X0, Y0, X0 + 100, Y0 + 100)),
+    ("Kelurahan B", "Kecamatan B", "Kota A", (X0 + 100, Y0, X0 + 200, Y0 + 100)),
+]
+
+# L-shaped (concave) footprint: 10x10 m square minus a 6x6 m corner, 64 m²
+L_FOOTPRINT = [(0, 0), (10, 0), (10, 4), (4, 4), (4, 10), (0, 10)]
+
+
+def write_boundaries(path, boundaries, to_lonlat=False):
+    """Write kelurahan boxes as a GeoJSON file, in UTM 48S or WGS84"""
+    transform = Transformer.from_crs("EPSG:32748", "EPSG:4326", always_xy=True).transform
+    features = []
+    for kelurahan, kecamatan, kota, (minx, miny, maxx, maxy) in boundaries:
+        ring = [(minx, miny), (maxx, miny), (maxx, maxy), (minx, maxy), (minx, miny)]
+        if to_lonlat:
+            ring = [transform(x, y) for x, y in ring]
+        features.append({
+            "type": "Feature",
+            "properties": {"WADMKD": kelurahan, "WADMKC": kecamatan, "WADMKK": kota},
+            "geometry": {"type": "Polygon", "coordinates": [[list(p) for p in ring]]},
+        })
+    crs = "urn:ogc:def:crs:OGC:1.3:CRS84" if to_lonlat else "urn:ogc:def:crs:EPSG::32748"
+    path.write_text(json.dumps({"type": "FeatureCollection",
+                                "crs": {"type": "name", "properties": {"name": crs}},
+                                "features": features}))
+    return path
+
+
+def write_prism(path, footprint, x, y, height):
+    """Write an extruded footprint, shifted to (x, y), as a minimal OBJ file"""
+    n = len(footprint)
+    lines = [f"v {x + px} {y + py} {z}" for z in (0.0, height) for px, py in footprint]
+    lines.append("f " + " ".join(str(i + 1) for i in reversed(range(n))))
+    lines.append("f " + " ".join(str(n + i + 1) for i in range(n)))
+    for i in range(n):
+        j = (i + 1) % n
+        lines.append(f"f {i + 1} {j + 1} {n + j + 1} {n + i + 1}")
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+@pytest.fixture
+def generator(tmp_path):
+    geojson = write_boundaries(tmp_path / "kelurahan.geojson", BOUNDARIES)
+    obj_dir = tmp_path / "obj"
+    obj_dir.mkdir()
+    return OBJToCSVGenerator(str(geojson), str(obj_dir), str(tmp_path / "out"))
+
+
+# Inside A, inside B, and outside both (nearest-boundary fallback)
+CENTROIDS_X = [X0 + 50.5, X0 + 150.5, X0 + 250.5, X0 - 30.5]
+CENTROIDS_Y = [Y0 + 50.5, Y0 + 20.5, Y0 + 50.5, Y0 + 90.5]
+
+
+def test_batch_admin_lookup_matches_scalar(generator):
+    batch = generator.find_overlapping_admin_batch(CENTROIDS_X, CENTROIDS_Y)
+    scalar = [generator.find_overlapping_admin(x, y) for x, y in zip(CENTROIDS_X, CENTROIDS_Y)]
+
+    assert batch == scalar
+    assert [info['kelurahan'] for info in batch] == ["Kelurahan A", "Kelurahan B", "Kelurahan B", "Kelurahan A"]
+
+
+def test_batch_nib_nop_match_scalar(generator):
+    admin_infos = generator.find_overlapping_admin_batch(CENTROIDS_X, CENTROIDS_Y)
+    admin_codes = [generator.lookup_admin_codes(a) for a in admin_infos]
+
+    nibs = generator.generate_nib_batch(admin_codes, CENTROIDS_X, CENTROIDS_Y)
+    nops = generator.generate_nop_batch(admin_codes, CENTROIDS_X, CENTROIDS_Y)
+
+    for info, x, y, nib, nop in zip(admin_infos, CENTROIDS_X, CENTROIDS_Y, nibs, nops):
+        assert nib == generator.generate_nib(info['kota'], info['kecamatan'], x, y)
+        assert nop == generator.generate_nop(info['kota'], info['kecamatan'], info['kelurahan'], x, y)
+
+
+def test_batch_nop_keeps_kelurahan_codes_past_999(tmp_path):
+    boundaries = [(f"Kelurahan {i}", "Kecamatan A", "Kota A", (X0 + 10 * i, Y0, X0 + 10 * i + 10, Y0 + 10))
+                  for i in range(1001)]
+    geojson = write_boundaries(tmp_path / "kelurahan.geojson", boundaries)
+    generator = OBJToCSVGenerator(str(geojson), str(tmp_path), str(tmp_path / "out"))
+    xs, ys = [X0 + 5.5, X0 + 10005.5], [Y0 + 5.5, Y0 + 5.5]
+
+    admin_infos = generator.find_overlapping_admin_batch(xs, ys)
+    admin_codes = [generator.lookup_admin_codes(a) for a in admin_infos]
+    assert admin_codes[1][2] == "1001"
+
+    nops = generator.generate_nop_batch(admin_codes, xs, ys)
+    assert nops == [generator.generate_nop(a['kota'], a['kecamatan'], a['kelurahan'], x, y)
+                    for a, x, y in zip(admin_infos, xs, ys)]
+
+
+def test_obj_crs_reprojects_boundaries(tmp_path):
+    geojson = write_boundaries(tmp_path / "kelurahan.geojson", BOUNDARIES, to_lonlat=True)
+    generator = OBJToCSVGenerator(str(geojson), str(tmp_path), str(tmp_path / "out"), obj_crs="EPSG:32748")
+
+    admin_infos = generator.find_overlapping_admin_batch(CENTROIDS_X[:2], CENTROIDS_Y[:2])
+    assert [info['kelurahan'] for info in admin_infos] == ["Kelurahan A", "Kelurahan B"]
+
+
+def test_ground_area_of_concave_footprint(generator, tmp_path):
+    obj_path = write_prism(tmp_path / "obj" / "l_shape.obj", L_FOOTPRINT, X0 + 20, Y0 + 20, 7.5)
+
+    metrics = generator.compute_building_metrics(str(obj_path))
+    assert metrics['ground_area'] == pytest.approx(64.0)
+    assert metrics['building_height'] == pytest.approx(7.5)
+
+
+def test_csv_matches_per_building_path(generator, tmp_path):
+    obj_dir = tmp_path / "obj"
+    write_prism(obj_dir / "l_shape.obj", L_FOOTPRINT, X0 + 20, Y0 + 20, 12.0)
+    write_prism(obj_dir / "box.obj", [(0, 0), (8, 0), (8, 5), (0, 5)], X0 + 150, Y0 + 40, 4.0)
+    write_prism(obj_dir / "outside.obj", [(0, 0), (6, 0), (6, 6), (0, 6)], X0 + 300, Y0 + 10, 3.0)
+
+    generator.generate_csv_for_all_obj(max_workers=1)
+    with open(tmp_path / "out" / "buildings_data.csv", newline='', encoding='utf-8') as f:
+        rows = {row['uuid']: row for row in csv.DictReader(f)}
+
+    assert sorted(rows) == ["box", "l_shape", "outside"]
+    for name, row in rows.items():
+        expected = generator.process_obj_file(str(obj_dir / f"{name}.obj"))
+        for key, value in expected.items():
+            if key != 'ownerName':
+                assert row[key] == str(value), (name, key)
+
+    assert rows['l_shape']['buildingArea'] == "64.0"
+    assert rows['box']['village'] == "Kelurahan B"
+    assert rows['outside']['village'] == "Kelurahan B"
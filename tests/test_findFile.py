@@ -0,0 +1,54 @@
+from findFile import find_and_group_files, find_complete_sets, scan_all
+
+# One complete set per directory except "partial", which has no outline
+FILES = [
+    "AG_09_A/AG_09_A.obj",
+    "AG_09_A/AG_09_A.txt",
+    "AG_09_A/BO_AG_09_A.geojson",
+    "AG_09_B/AG_09_B.OBJ",
+    "AG_09_B/AG_09_B.TXT",
+    "AG_09_B/BO_AG_09_B.GeoJSON",
+    "nested/AG_09_C/AG_09_C.obj",
+    "nested/AG_09_C/AG_09_C.txt",
+    "nested/AG_09_C/BO_AG_09_C.geojson",
+    "nested/AG_09_C/AG_09_C.mtl",
+    "partial/partial.obj",
+    "partial/partial.txt",
+    "notes.txt",
+]
+
+
+def make_tree(root):
+    for name in FILES:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+    return root
+
+
+def test_scan_all_matches_both_functions(tmp_path):
+    root = str(make_tree(tmp_path))
+
+    assert scan_all(root) == (find_and_group_files(root), find_complete_sets(root))
+    assert scan_all(root, ['.obj', '.mtl']) == (find_and_group_files(root, ['.obj', '.mtl']),
+                                                find_complete_sets(root, ['.obj', '.mtl']))
+
+
+def test_complete_sets_need_every_extension(tmp_path):
+    root = make_tree(tmp_path)
+
+    sets = find_complete_sets(str(root))
+    assert sets == [
+        [str(root / "AG_09_A/AG_09_A.obj"), str(root / "AG_09_A/AG_09_A.txt"), str(root / "AG_09_A/BO_AG_09_A.geojson")],
+        [str(root / "AG_09_B/AG_09_B.OBJ"), str(root / "AG_09_B/AG_09_B.TXT"), str(root / "AG_09_B/BO_AG_09_B.GeoJSON")],
+        [str(root / "nested/AG_09_C/AG_09_C.obj"), str(root / "nested/AG_09_C/AG_09_C.txt"),
+         str(root / "nested/AG_09_C/BO_AG_09_C.geojson")],
+    ]
+
+    groups = find_and_group_files(str(root))
+    assert [str(root / "partial/partial.obj"), str(root / "partial/partial.txt")] in groups
+    assert [str(root / "notes.txt")] in groups
+
+
+def test_missing_root(tmp_path):
+    assert scan_all(str(tmp_path / "missing")) == ([], [])
@@ -0,0 +1,105 @@
+import xml.etree.ElementTree as ET
+
+from lod2merge import CityGMLMerger
+
+NS = {
+    'gml': 'http://www.opengis.net/gml',
+    'core': 'http://www.opengis.net/citygml/2.0',
+    'bldg': 'http://www.opengis.net/citygml/building/2.0',
+}
+GML_ID = '{http://www.opengis.net/gml}id'
+XLINK_HREF = '{http://www.w3.org/1999/xlink}href'
+
+# One building with a wall whose geometry is referenced by xlink:href
+CITYGML_TEMPLATE = """\
+<?xml version="1.0" encoding="UTF-8"?>
+<core:CityModel xmlns:gml="http://www.opengis.net/gml" xmlns:core="http://www.opengis.net/citygml/2.0" \
+xmlns:bldg="http://www.opengis.net/citygml/building/2.0" xmlns:xlink="http://www.w3.org/1999/xlink">
+  <gml:name>{name}</gml:name>
+  <gml:boundedBy>
+    <gml:Envelope srsName="EPSG:32748" srsDimension="3">
+      <gml:lowerCorner>{lower}</gml:lowerCorner>
+      <gml:upperCorner>{upper}</gml:upperCorner>
+    </gml:Envelope>
+  </gml:boundedBy>
+  <core:cityObjectMember>
+    <bldg:Building gml:id="UUID_{name}">
+      <gml:description>Building {name}, created by converter</gml:description>
+      <bldg:boundedBy>
+        <bldg:WallSurface gml:id="UUID_{name}_wall">
+          <bldg:lod2MultiSurface>
+            <gml:MultiSurface>
+              <gml:surfaceMember xlink:href="#UUID_{name}_poly"/>
+              <gml:surfaceMember>
+                <gml:Polygon gml:id="UUID_{name}_poly">
+                  <gml:exterior>
+                    <gml:LinearRing>
+                      <gml:posList>{lower} {upper} {lower}</gml:posList>
+                    </gml:LinearRing>
+                  </gml:exterior>
+                </gml:Polygon>
+              </gml:surfaceMember>
+            </gml:MultiSurface>
+          </bldg:lod2MultiSurface>
+        </bldg:WallSurface>
+      </bldg:boundedBy>
+    </bldg:Building>
+  </core:cityObjectMember>
+</core:CityModel>
+"""
+
+
+def write_citygml(path, name, lower, upper):
+    text = CITYGML_TEMPLATE.format(name=name, lower=" ".join(map(str, lower)), upper=" ".join(map(str, upper)))
+    path.write_text(text, encoding='utf-8')
+    return text
+
+
+def merge(tmp_path, name="AG_09_C", author="Jane Roe"):
+    """Merge the files of tmp_path/in and parse the result with ElementTree"""
+    output = tmp_path / "merged.gml"
+    CityGMLMerger().merge_files(str(tmp_path / "in"), str(output), name, author)
+    return ET.parse(output).getroot()
+
+
+def test_merge_round_trip(tmp_path):
+    (tmp_path / "in").mkdir()
+    write_citygml(tmp_path / "in" / "a.gml", "a", (10, 20, 0), (14, 28, 6))
+    write_citygml(tmp_path / "in" / "b.gml", "b", (5, 25, 1), (9, 30, 8))
+
+    root = merge(tmp_path)
+
+    assert root.find('gml:name', NS).text == "AG_09_C"
+    envelope = root.find('gml:boundedBy/gml:Envelope', NS)
+    assert envelope.get('srsName') == "EPSG:32748"
+    assert envelope.find('gml:lowerCorner', NS).text == "5.0 20.0 0.0"
+    assert envelope.find('gml:upperCorner', NS).text == "14.0 30.0 8.0"
+
+    buildings = root.findall('core:cityObjectMember/bldg:Building', NS)
+    assert [b.get(GML_ID) for b in buildings] == ["AG_09_C_a", "AG_09_C_b"]
+    assert [e.get(GML_ID) for e in root.iter() if e.get(GML_ID)] == [
+        "AG_09_C_a", "AG_09_C_a_wall", "AG_09_C_a_poly",
+        "AG_09_C_b", "AG_09_C_b_wall", "AG_09_C_b_poly",
+    ]
+    assert [e.get(XLINK_HREF) for e in root.iter() if e.get(XLINK_HREF)] == ["#AG_09_C_a_poly", "#AG_09_C_b_poly"]
+    assert [d.text for d in root.iter('{http://www.opengis.net/gml}description')] == [
+        "Building a, created by Jane Roe", "Building b, created by Jane Roe",
+    ]
+    assert root.find('.//gml:posList', NS).text == "10 20 0 14 28 6 10 20 0"
+
+
+def test_truncated_file_is_left_out(tmp_path, capsys):
+    (tmp_path / "in").mkdir()
+    write_citygml(tmp_path / "in" / "a.gml", "a", (10, 20, 0), (14, 28, 6))
+    write_citygml(tmp_path / "in" / "b.gml", "b", (5, 25, 1), (9, 30, 8))
+    # Complete header with a far-off envelope, cut off inside its building
+    text = write_citygml(tmp_path / "in" / "c.gml", "c", (-999, -999, 0), (-990, -990, 1))
+    (tmp_path / "in" / "c.gml").write_text(text[:text.index("<bldg:boundedBy>")], encoding='utf-8')
+
+    root = merge(tmp_path)
+
+    envelope = root.find('gml:boundedBy/gml:Envelope', NS)
+    assert envelope.find('gml:lowerCorner', NS).text == "5.0 20.0 0.0"
+    assert envelope.find('gml:upperCorner', NS).text == "14.0 30.0 8.0"
+    assert [b.get(GML_ID) for b in root.findall('core:cityObjectMember/bldg:Building', NS)] == ["AG_09_C_a", "AG_09_C_b"]
+    assert "merged 2 city objects from 2 files" in capsys.readouterr().out
@@ -0,0 +1,72 @@
+import pytest
+
+from semantic_mapping import BuildingColorizer, GROUND, WALL, ROOF
+
+# 0.5 m cube: bottom and top split into two triangles, four quad walls
+CUBE_OBJ = """\
+v 0 0 0
+v 0.5 0 0
+v 0.5 0.5 0
+v 0 0.5 0
+v 0 0 0.5
+v 0.5 0 0.5
+v 0.5 0.5 0.5
+v 0 0.5 0.5
+f 1 3 2
+f 1 4 3
+f 5 6 7
+f 5 7 8
+f 1 2 6 5
+f 2 3 7 6
+f 3 4 8 7
+f 4 1 5 8
+"""
+
+# Wall of four 0.3 m quads with a small horizontal ledge in the middle, closer than
+# NEIGHBOR_RADIUS to all of them
+LEDGE_OBJ = """\
+v 0 0 0
+v 0 0.3 0
+v 0 0.6 0
+v 0 0 0.3
+v 0 0.3 0.3
+v 0 0.6 0.3
+v 0 0 0.6
+v 0 0.3 0.6
+v 0 0.6 0.6
+v 0 0.25 0.3
+v 0.1 0.3 0.3
+v 0 0.35 0.3
+f 1 2 5 4
+f 2 3 6 5
+f 4 5 8 7
+f 5 6 9 8
+f 10 12 11
+"""
+
+
+def classify(tmp_path, obj_text, **options):
+    obj_path = tmp_path / "building.obj"
+    obj_path.write_text(obj_text)
+    colorizer = BuildingColorizer(tmp_path, tmp_path / "missing.geojson", **options)
+    classifications, _ = colorizer.process_mesh(*colorizer.load_obj_file(obj_path))
+    return classifications.tolist(), colorizer.stats['classification_changes']
+
+
+@pytest.mark.parametrize("context_voting", [False, True])
+def test_cube_labels(tmp_path, context_voting):
+    labels, changes = classify(tmp_path, CUBE_OBJ, context_voting=context_voting)
+    assert labels == [GROUND, GROUND, ROOF, ROOF, WALL, WALL, WALL, WALL]
+    assert changes == 0
+
+
+def test_ledge_keeps_base_label_by_default(tmp_path):
+    labels, changes = classify(tmp_path, LEDGE_OBJ)
+    assert labels == [WALL, WALL, WALL, WALL, ROOF]
+    assert changes == 0
+
+
+def test_context_voting_relabels_ledge(tmp_path):
+    labels, changes = classify(tmp_path, LEDGE_OBJ, context_voting=True)
+    assert labels == [WALL, WALL, WALL, WALL, WALL]
+    assert changes == 1
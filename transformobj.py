@@ -2,27 +2,39 @@ import numpy as np
 from pyproj import Transformer
 import os
 
-def transform_obj_coordinates(input_obj, output_obj, local_reference, utm_reference):
+def read_vertex_coordinates(vertex_lines):
+    # Parse the x, y and z of all vertex lines in one call
+    try:
+        return np.loadtxt(vertex_lines, usecols=(1, 2, 3), comments=None, ndmin=2)
+    except ValueError:
+        # Tokens NumPy does not read go through float() line by line
+        return np.array([list(map(float, line.split()[1:4])) for line in vertex_lines])
+
+def transform_obj_coordinates(input_obj, output_obj, local_reference, utm_reference, decimals=None):
+    # Vertices keep the shortest exact form of each coordinate unless a fixed number of decimals is given
+    if decimals is None:
+        vertex_format = "v %r %r %r\n"
+    else:
+        vertex_format = f"v %.{decimals}f %.{decimals}f %.{decimals}f\n"
+    
     # Calculate translation vector
     translation_vector = np.array(utm_reference) - np.array(local_reference)
 
-    # Open input and output files
-    with open(input_obj, 'r') as infile, open(output_obj, 'w') as outfile:
-        for line in infile:
-            if line.startswith('v '):  # Only process vertex lines
-                parts = line.split()
-                x_local, y_local, z_local = map(float, parts[1:4])
-                
-                # Apply translation
-                x_utm = x_local + translation_vector[0]
-                y_utm = y_local + translation_vector[1]
-                z_utm = z_local + translation_vector[2]
-                
-                # Write transformed vertex
-                outfile.write(f"v {x_utm} {y_utm} {z_utm}\n")
-            else:
-                # Copy other lines directly
-                outfile.write(line)
+    with open(input_obj, 'r') as infile:
+        lines = infile.readlines()
+        
+    # Only vertex lines are processed, translated all at once
+    vertex_rows = [i for i, line in enumerate(lines) if line.startswith('v ')]
+    if vertex_rows:
+        coords = read_vertex_coordinates([lines[i] for i in vertex_rows])
+        coords += translation_vector
+        
+        # Write transformed vertices back in place; other lines are copied directly
+        for i, xyz_utm in zip(vertex_rows, map(tuple, coords.tolist())):
+            lines[i] = vertex_format % xyz_utm
+            
+    with open(output_obj, 'w') as outfile:
+        outfile.write(''.join(lines))
     print(f"Transformed OBJ file saved to: {output_obj}")
 
 transform_obj_coordinates("leger/coba.obj", "leger/coba_translated.obj", (0,0,0), (428501.44556600949727, 9137577.566948587074876, 100.559806823730469))
\ No newline at end of file